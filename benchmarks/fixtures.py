@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+
+GDP_PATH = os.path.join("data", "pib", "pib", "pib.csv")
+WATER_PATH = os.path.join("data", "eau", "eau.csv")
+
+
+def get_country_codes(nb_countries):
+    codes = ["FRA", "DEU", "USA", "CHN", "IND", "BRA"]
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    for a in letters:
+        for b in letters:
+            if len(codes) >= nb_countries:
+                return codes
+            code = "Z" + a + b
+            codes.append(code)
+    return codes[:nb_countries]
+
+
+def write_world_bank_csv(path, years, country_codes, scale, nan_ratio, seed):
+    """
+    Writes a CSV shaped like the World Bank downloads: 4 metadata lines, 4 metadata
+    columns, one column per year and a trailing empty column.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    columns = ["Country Name", "Country Code", "Indicator Name", "Indicator Code"]
+    columns += [str(year) for year in years]
+    with open(path, "w") as file:
+        file.write('"Data Source","World Development Indicators",\n\n')
+        file.write('"Last Updated Date","2024-01-01",\n\n')
+        file.write(",".join(f'"{column}"' for column in columns) + ",\n")
+        for country_code in country_codes:
+            values = rng.random(len(years)) * scale
+            values[rng.random(len(years)) < nan_ratio] = np.nan
+            cells = ["" if np.isnan(value) else repr(float(value)) for value in values]
+            metadata = [f"Country {country_code}", country_code, "Synthetic", "SYN.X"]
+            file.write(",".join(f'"{cell}"' for cell in metadata + cells) + ",\n")
+
+
+def create_fixtures(root, nb_countries=266):
+    """
+    Creates the synthetic GDP and water CSVs under root, at the paths the loaders expect.
+
+    Args:
+    - root (str): Directory used as working directory by the benchmarks.
+    - nb_countries (int): Number of countries (the World Bank files have 266 rows).
+    """
+    country_codes = get_country_codes(nb_countries)
+    write_world_bank_csv(
+        os.path.join(root, GDP_PATH), range(1960, 2023), country_codes, 3e12, 0.1, 0
+    )
+    write_world_bank_csv(
+        os.path.join(root, WATER_PATH), range(1960, 2024), country_codes, 130, 0.5, 1
+    )
+    return country_codes
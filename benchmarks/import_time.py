@@ -0,0 +1,86 @@
+"""Import-time budget of the command-line entry point.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time [--budget-ms 50]
+
+tests/test_import_time.py checks the same budgets as part of the test suite.
+
+Measures the time of 'import main' and of the compute path imports on top of a bare
+interpreter start, and checks which heavy modules they load. The exit code is 1 if
+the budget is exceeded or if a heavy module is imported where it should not be.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 50.0
+
+CHECK_MODULES = (
+    "import sys, json; print(json.dumps(sorted(m for m in {} if m in sys.modules)))"
+)
+
+# (statement, modules it must not import, budget in ms or None for the default one)
+CASES = [
+    ("import main", ["pandas", "numpy", "matplotlib"], None),
+    (
+        "import main; main.get_parser().parse_args(['compute'])",
+        ["pandas", "matplotlib"],
+        None,
+    ),
+    ("import src.pipeline", ["matplotlib"], 1000),
+]
+
+
+def time_statement(statement, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def get_loaded_modules(statement, modules):
+    check = CHECK_MODULES.format(repr(set(modules)))
+    output = subprocess.run(
+        [sys.executable, "-c", statement + "; " + check],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    reference = time_statement("pass", args.repeat)
+    failures = []
+    for statement, forbidden_modules, budget in CASES:
+        budget = budget or args.budget_ms
+        elapsed_ms = (time_statement(statement, args.repeat) - reference) * 1000
+        loaded = get_loaded_modules(statement, forbidden_modules)
+        status = "ok"
+        if elapsed_ms > budget:
+            status = f"OVER BUDGET ({budget:.0f} ms)"
+        if loaded:
+            status = f"IMPORTS {', '.join(loaded)}"
+        if status != "ok":
+            failures.append(statement)
+        print(f"{statement:<60} {elapsed_ms:>8.1f} ms  {status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
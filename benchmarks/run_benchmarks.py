@@ -0,0 +1,246 @@
+"""Benchmarks of the indicator -> limits -> aggregation pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                   # run and compare to the baseline
+    python -m benchmarks.run_benchmarks --save-baseline   # store the timings as the new baseline
+    python -m benchmarks.run_benchmarks -k calculate      # only the benchmarks matching 'calculate'
+
+Every benchmark runs on synthetic World Bank-shaped CSVs generated in a temporary
+directory, so no network access or real data is needed. The exit code is 1 when a
+benchmark is slower than the baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from src.limit_process import LimitImplementorFactory, process_limits
+from src.pipeline import process_all
+from src.utils import plotting
+from src.utils.f_base import (
+    PiecewiseLinearCurve,
+    get_tabulated_curve,
+    linear_interpolation,
+)
+from src.utils.registry import DATA_REGISTRY
+
+from .fixtures import create_fixtures
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+LIST_POINTS = [(0.5, 1), (0.7, 0.8), (0.8, 0.7), (0.9, 0.5), (1, 0)]
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=5):
+    def decorator(function):
+        BENCHMARKS[name] = (function, repeat)
+        return function
+
+    return decorator
+
+
+def get_limits(nb_limits):
+    return {
+        f"water_{k}": {
+            "coef": 1 / nb_limits,
+            "config": "water_general_wb",
+            "dict_parameters": {
+                "country_code": "FRA",
+                "list_points": [(0.3 + 0.01 * k, 1), (1.0, 0)],
+            },
+        }
+        for k in range(nb_limits)
+    }
+
+
+def clear_caches(disk=False):
+    DATA_REGISTRY.invalidate()
+    if disk:
+        for root, directories, _ in os.walk("data"):
+            if ".cache" in directories:
+                shutil.rmtree(os.path.join(root, ".cache"))
+
+
+@benchmark("linear_interpolation_scalar_10k")
+def bench_linear_interpolation_scalar():
+    for x in np.linspace(0, 1.5, 10_000):
+        linear_interpolation(x, LIST_POINTS)
+
+
+@benchmark("linear_interpolation_array_1m")
+def bench_linear_interpolation_array():
+    PiecewiseLinearCurve(LIST_POINTS)(np.linspace(0, 1.5, 1_000_000))
+
+
+@benchmark("linear_interpolation_tabulated_1m")
+def bench_linear_interpolation_tabulated():
+    get_tabulated_curve(tuple(LIST_POINTS))(np.linspace(0, 1.5, 1_000_000))
+
+
+def get_implementor(kind):
+    if kind == "gdp":
+        from src.indicator_process import IndicatorImplementorFactory
+
+        return IndicatorImplementorFactory.get_implementor("gdp")
+    return LimitImplementorFactory.get_implementor("water_general_wb", "water")
+
+
+for kind in ["gdp", "water"]:
+
+    def bench_cold(kind=kind):
+        clear_caches(disk=True)
+        get_implementor(kind).data_creation()
+
+    def bench_warm_disk(kind=kind):
+        clear_caches()
+        get_implementor(kind).data_creation()
+
+    def bench_warm(kind=kind):
+        get_implementor(kind).data_creation()
+
+    benchmark(f"data_creation_{kind}_cold")(bench_cold)
+    benchmark(f"data_creation_{kind}_warm_disk")(bench_warm_disk)
+    benchmark(f"data_creation_{kind}_warm")(bench_warm)
+
+
+@benchmark("water_calculate_one_country")
+def bench_calculate_one_country():
+    indicator = get_implementor("gdp").data_creation()["FRA"].rename("gdp")
+    LimitImplementorFactory.get_implementor(
+        "water_general_wb", "water", {"country_code": "FRA"}
+    ).calculate(indicator)
+
+
+@benchmark("water_calculate_all_countries")
+def bench_calculate_all_countries():
+    indicator = get_implementor("gdp").data_creation()
+    LimitImplementorFactory.get_implementor("water_general_wb", "water").calculate(
+        indicator
+    )
+
+
+@benchmark("process_limits_1_limit")
+def bench_process_limits_1():
+    indicator = get_implementor("gdp").data_creation()["FRA"].rename("gdp")
+    process_limits(indicator, get_limits(1))
+
+
+@benchmark("process_limits_20_limits")
+def bench_process_limits_20():
+    indicator = get_implementor("gdp").data_creation()["FRA"].rename("gdp")
+    process_limits(indicator, get_limits(20))
+
+
+@benchmark("plot_indicator_with_all_limits", repeat=3)
+def bench_plot():
+    dict_all_limits = get_limits(5)
+    indicator_adjusted = process_all(dict_all_limits, "gdp", "FRA")
+    plotting.plot_indicator_with_all_limits(
+        indicator_adjusted=indicator_adjusted,
+        indicator_name="gdp",
+        dict_limits_config=dict_all_limits,
+    )
+    plt.close("all")
+
+
+def run_benchmark(function, repeat):
+    function()  # Warm-up, imports...
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_s": float(np.median(timings)),
+        "min_s": min(timings),
+        "peak_bytes": peak,
+    }
+
+
+def run(names, nb_countries):
+    results = {}
+    initial_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        create_fixtures(root, nb_countries=nb_countries)
+        os.chdir(root)
+        try:
+            for name in names:
+                function, repeat = BENCHMARKS[name]
+                results[name] = run_benchmark(function, repeat)
+                print(
+                    f"{name:<40} {results[name]['median_s'] * 1000:>10.3f} ms"
+                    f" {results[name]['peak_bytes'] / 1024**2:>10.2f} MiB"
+                )
+        finally:
+            clear_caches()
+            os.chdir(initial_directory)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["median_s"] / baseline[name]["median_s"]
+        status = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"{name:<40} x{ratio:>6.2f} vs baseline {status}")
+        if status != "ok":
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", default="", help="only run benchmarks containing this")
+    parser.add_argument("--countries", type=int, default=266)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed relative slowdown"
+    )
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.k in name]
+    results = run(names, args.countries)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare to, run with --save-baseline first")
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    return 1 if compare(results, baseline, args.tolerance) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,52 @@
-from src.indicator_process import IndicatorImplementorFactory
-from src.limit_process import LimitImplementorFactory, process_limits
-import src.utils.plotting as plot
+"""Command-line entry point.
 
+    python main.py compute --country FRA --output fra.csv
+    python main.py compute --all-countries --output world.csv
+    python main.py plot --country FRA --output fra.png
+    python main.py sweep grid.json --workers 8 --output results.csv
+    python main.py warm-cache
+    python main.py cache stats
+    python main.py serve --port 8000
+    python main.py project --to-year 2100 --output projection.csv
+    python main.py solve target.csv --country FRA --curves water --output best.json
 
-def process_all(dict_all_limits, indicator_name, country_code="FRA"):
-    indicator_data = IndicatorImplementorFactory.get_implementor(
-        indicator_name
-    ).data_creation()
-    indicator_data = indicator_data[country_code]
-    indicator_data.rename(indicator_name, inplace=True)
+Heavy modules (pandas, the pipeline, matplotlib) are imported inside the commands that
+need them, so that parsing the arguments stays fast and only the plot command loads
+matplotlib.
+"""
+
+import argparse
+import json
+import sys
+
+
+def get_default_limits(country_code="FRA"):
+    from src.pipeline import get_default_limits
+
+    return get_default_limits(country_code)
+
+
+def process_all(
+    dict_all_limits, indicator_name, country_code="FRA", cache=None, result_cache=None
+):
+    from src.pipeline import process_all
+
+    return process_all(
+        dict_all_limits,
+        indicator_name,
+        country_code=country_code,
+        cache=cache,
+        result_cache=result_cache,
+    )
 
-    indicator_adjusted_data = process_limits(indicator_data, dict_all_limits)
-    return indicator_adjusted_data
 
+def main(
+    country_code="FRA", dict_all_limits=None, indicator_name="gdp", output_path=None
+):
+    import src.utils.plotting as plot
 
-def main(country_code="FRA", dict_all_limits=None, indicator_name="gdp"):
     if dict_all_limits is None:
-        dict_all_limits = {
-            "water": {
-                "coef": 1.0,
-                "config": "water_general_wb",
-                "dict_parameters": {"country_code": country_code},
-            }
-        }
+        dict_all_limits = get_default_limits(country_code)
 
     indicator_adjusted_data = process_all(
         dict_all_limits, indicator_name=indicator_name, country_code=country_code
@@ -31,14 +55,313 @@ def main(country_code="FRA", dict_all_limits=None, indicator_name="gdp"):
     indicator_adjusted_data_to_plot = indicator_adjusted_data.dropna()
     first_year_to_plot = indicator_adjusted_data_to_plot.index.min()
     last_year_to_plot = indicator_adjusted_data_to_plot.index.max()
-    plot.plot_indicator_with_all_limits(
+    return plot.plot_indicator_with_all_limits(
         indicator_adjusted=indicator_adjusted_data,
         indicator_name=indicator_name,
         dict_limits_config=dict_all_limits,
         from_year=first_year_to_plot,
         to_year=last_year_to_plot,
+        output_path=output_path,
+    )
+
+
+def sweep(
+    dict_all_limits,
+    country_codes=("FRA",),
+    list_coefs=None,
+    dict_list_points=None,
+    indicator_name="gdp",
+    max_workers=None,
+    chunksize=16,
+    output_path=None,
+):
+    """Runs process_all on every combination of countries, coefs and curves in parallel.
+
+    See src.sweep.build_grid for the format of the variants. With output_path (.csv or
+    .jsonl) the results are streamed to that file and a crashed sweep resumes from it.
+
+    Returns:
+        pd.DataFrame: tidy table with columns scenario_id, country_code, year, variable,
+        value. With output_path, output_path itself: the streamed results are not read
+        back into memory.
+    """
+    from src.sweep import build_grid, run_sweep
+    from src.utils.sinks import get_sink
+
+    scenarios = build_grid(
+        dict_all_limits,
+        country_codes=country_codes,
+        list_coefs=list_coefs,
+        dict_list_points=dict_list_points,
+        indicator_name=indicator_name,
+    )
+    if output_path is None:
+        return run_sweep(scenarios, max_workers=max_workers, chunksize=chunksize)
+
+    with get_sink(output_path) as sink:
+        run_sweep(scenarios, max_workers=max_workers, chunksize=chunksize, sink=sink)
+    return output_path
+
+
+def warm_cache(indicator_names=("gdp",), dict_all_limits=None):
+    """Parses the source files of the indicators and limits into the on-disk cache."""
+    from src.sweep import warm_datasets
+
+    if dict_all_limits is None:
+        dict_all_limits = get_default_limits()
+    limit_configs = sorted({limit["config"] for limit in dict_all_limits.values()})
+    warm_datasets(indicator_names, limit_configs)
+
+
+def read_json(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def get_limits_argument(args, country_code):
+    if args.config is None:
+        return get_default_limits(country_code)
+    dict_all_limits = read_json(args.config)
+    if country_code is not None:
+        # The indicator is the one of --country: the limits must use the same country
+        for dict_limit in dict_all_limits.values():
+            dict_parameters = dict(dict_limit.get("dict_parameters") or {})
+            dict_parameters["country_code"] = country_code
+            dict_limit["dict_parameters"] = dict_parameters
+    return dict_all_limits
+
+
+def command_compute(args):
+    country_code = None if args.all_countries else args.country
+    dict_all_limits = get_limits_argument(args, country_code)
+    indicator_adjusted_data = process_all(
+        dict_all_limits,
+        indicator_name=args.indicator,
+        country_code=country_code,
+        result_cache=None if args.no_cache else True,
     )
+    indicator_adjusted_data.to_csv(args.output or sys.stdout)
+
+
+def command_plot(args):
+    dict_all_limits = get_limits_argument(args, args.country)
+    output_path = main(
+        country_code=args.country,
+        dict_all_limits=dict_all_limits,
+        indicator_name=args.indicator,
+        output_path=args.output,
+    )
+    if output_path:
+        print(output_path)
+
+
+def command_sweep(args):
+    grid = read_json(args.grid)
+    result = sweep(
+        grid["dict_all_limits"],
+        country_codes=grid.get("country_codes", ["FRA"]),
+        list_coefs=grid.get("list_coefs"),
+        dict_list_points=grid.get("dict_list_points"),
+        indicator_name=grid.get("indicator_name", "gdp"),
+        max_workers=args.workers,
+        chunksize=args.chunksize,
+        output_path=args.output,
+    )
+    if args.output is None:
+        result.to_csv(sys.stdout, index=False)
+
+
+def command_warm_cache(args):
+    dict_all_limits = None if args.config is None else read_json(args.config)
+    warm_cache(indicator_names=args.indicator, dict_all_limits=dict_all_limits)
+
+
+def command_cache(args):
+    from src.utils.result_cache import ResultCache
+
+    result_cache = ResultCache()
+    if args.action == "clear":
+        result_cache.clear()
+    print(json.dumps(result_cache.stats(), indent=2))
+
+
+def command_serve(args):
+    from src.server import QueryService, serve
+
+    dict_all_limits = get_limits_argument(args, None)
+    limit_configs = sorted({limit["config"] for limit in dict_all_limits.values()})
+    service = QueryService(
+        indicator_names=args.indicator,
+        limit_configs=limit_configs,
+        max_workers=args.workers,
+    )
+    serve(service, host=args.host, port=args.port)
+
+
+def command_solve(args):
+    import pandas as pd
+
+    from src.indicator_process import IndicatorImplementorFactory
+    from src.inverse import solve_inverse
+
+    country_code = None if args.all_countries else args.country
+    dict_all_limits = get_limits_argument(args, country_code)
+    indicator_data = IndicatorImplementorFactory.get_implementor(
+        args.indicator
+    ).data_creation()
+    target = pd.read_csv(args.target, index_col=0)
+    target.index = target.index.astype(indicator_data.index.dtype)
+    if country_code is None:
+        target.columns.name = indicator_data.columns.name
+    else:
+        indicator_data = indicator_data[country_code].rename(args.indicator)
+        target = target.iloc[:, 0]
+
+    result = solve_inverse(
+        indicator_data,
+        dict_all_limits,
+        target,
+        search_coefs=not args.fixed_coefs,
+        curve_limits=args.curves,
+        nb_candidates=args.candidates,
+        nb_iterations=args.iterations,
+        max_workers=args.workers,
+        indicator_name=args.indicator,
+    )
+    print(f"Mean squared error: {result['loss']}", file=sys.stderr)
+    output = json.dumps(result["dict_all_limits"], indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as file:
+            file.write(output)
+
+
+def command_project(args):
+    from src.projection import project_adjusted
+
+    country_codes = None if args.all_countries else [args.country]
+    dict_all_limits = get_limits_argument(args, args.country)
+    projection = project_adjusted(
+        dict_all_limits,
+        indicator_name=args.indicator,
+        country_codes=country_codes,
+        to_year=args.to_year,
+        indicator_model=args.model,
+        limit_models=dict(args.limit_model or []),
+        window=args.window,
+    )
+    projection.to_csv(args.output or sys.stdout)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="GDP under planetary constraints")
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_limits_arguments(subparser):
+        subparser.add_argument("--indicator", default="gdp")
+        subparser.add_argument(
+            "--config", help="JSON file with dict_all_limits (default: water only)"
+        )
+
+    compute = subparsers.add_parser("compute", help="compute the adjusted indicator")
+    add_limits_arguments(compute)
+    compute.add_argument("--country", default="FRA")
+    compute.add_argument("--all-countries", action="store_true")
+    compute.add_argument("--output", help="CSV file (default: standard output)")
+    compute.add_argument(
+        "--no-cache", action="store_true", help="ignore the on-disk result cache"
+    )
+    compute.set_defaults(function=command_compute)
+
+    plot = subparsers.add_parser("plot", help="plot the adjusted indicator")
+    add_limits_arguments(plot)
+    plot.add_argument("--country", default="FRA")
+    plot.add_argument("--output", help="image file (default: show the figure)")
+    plot.set_defaults(function=command_plot)
+
+    sweep = subparsers.add_parser("sweep", help="run a grid of scenarios")
+    sweep.add_argument(
+        "grid",
+        help="JSON file with dict_all_limits and optional country_codes, list_coefs, "
+        "dict_list_points and indicator_name",
+    )
+    sweep.add_argument("--workers", type=int)
+    sweep.add_argument("--chunksize", type=int, default=16)
+    sweep.add_argument("--output", help=".csv or .jsonl file, resumed if it exists")
+    sweep.set_defaults(function=command_sweep)
+
+    warm = subparsers.add_parser("warm-cache", help="parse the source files once")
+    warm.add_argument("--indicator", nargs="+", default=["gdp"])
+    warm.add_argument("--config", help="JSON file with dict_all_limits")
+    warm.set_defaults(function=command_warm_cache)
+
+    cache = subparsers.add_parser("cache", help="inspect the on-disk result cache")
+    cache.add_argument("action", choices=["stats", "clear"])
+    cache.set_defaults(function=command_cache)
+
+    server = subparsers.add_parser("serve", help="answer JSON queries over HTTP")
+    server.add_argument("--indicator", nargs="+", default=["gdp"])
+    server.add_argument("--config", help="JSON file with the limits to load at startup")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8000)
+    server.add_argument("--workers", type=int, default=4)
+    server.set_defaults(function=command_serve)
+
+    project = subparsers.add_parser(
+        "project", help="project the adjusted indicator to a future year"
+    )
+    add_limits_arguments(project)
+    project.add_argument("--country", default="FRA")
+    project.add_argument("--all-countries", action="store_true")
+    project.add_argument("--to-year", type=int, default=2100)
+    project.add_argument(
+        "--model",
+        default="constant_growth",
+        help="model of the indicator: constant_growth, linear_trend or log_trend",
+    )
+    project.add_argument(
+        "--limit-model",
+        nargs=2,
+        action="append",
+        metavar=("LIMIT", "MODEL"),
+        help="model of a limit (default: linear_trend)",
+    )
+    project.add_argument("--window", type=int, default=20)
+    project.add_argument("--output", help="CSV file (default: standard output)")
+    project.set_defaults(function=command_project)
+
+    solve = subparsers.add_parser(
+        "solve", help="find the coefs and curves that reach a target"
+    )
+    add_limits_arguments(solve)
+    solve.add_argument(
+        "target",
+        help="CSV of the target adjusted indicator: year then one column, or one "
+        "column per country with --all-countries",
+    )
+    solve.add_argument("--country", default="FRA")
+    solve.add_argument("--all-countries", action="store_true")
+    solve.add_argument(
+        "--curves", nargs="*", default=[], help="limits whose list_points are searched"
+    )
+    solve.add_argument("--fixed-coefs", action="store_true")
+    solve.add_argument("--candidates", type=int, default=2048)
+    solve.add_argument("--iterations", type=int, default=30)
+    solve.add_argument("--workers", type=int)
+    solve.add_argument("--output", help="JSON file for dict_all_limits")
+    solve.set_defaults(function=command_solve)
+
+    return parser
+
+
+def run(argv=None):
+    args = get_parser().parse_args(argv)
+    if args.command is None:
+        main()
+        return
+    args.function(args)
 
 
 if __name__ == "__main__":
-    main()
+    run()
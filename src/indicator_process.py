@@ -1,25 +1,14 @@
-import importlib
-
-CONFIG_MAP = {
-    "gdp": {
-        "module_name": "gdp_indicator",
-        "class_name": "GDPIndicator",
-    }
-}
+from .utils.instrumentation import stage
+from .utils.plugins import INDICATOR_PLUGINS
 
 
 class IndicatorImplementorFactory:
     @staticmethod
     def get_implementor(indicator_name, dict_parameters=None):
-        module_name = CONFIG_MAP[indicator_name]["module_name"]
-        class_name = CONFIG_MAP[indicator_name]["class_name"]
-        module_path = f".indicators.{module_name}"  # Assuming all limit modules are in a 'limits' package
-
         try:
-            # Dynamically import the module
-            module = importlib.import_module(module_path, package="src")
-            # Get the class from the module
-            cls = getattr(module, class_name)
+            # Resolve the class registered under indicator_name, imported once per process
+            with stage("factory_resolution", indicator=indicator_name):
+                cls = INDICATOR_PLUGINS.get(indicator_name)
             # Instantiate the class and return the instance
             return cls(
                 indicator_name, dict_parameters
@@ -1,30 +1,21 @@
 from .indicator_implementor import IndicatorImplementor
-import pandas as pd
+from ..utils.plugins import register_indicator
+from ..utils.registry import DATA_REGISTRY
 
 
+@register_indicator("gdp")
 class GDPIndicator(IndicatorImplementor):
     def __init__(self, indicator_name, dict_parameters=None):
         super().__init__(indicator_name, dict_parameters=dict_parameters)
 
         self.data_path = "data/pib/pib/pib.csv"
 
+    def panel_creation(self):
+        # Billions, scaled once when loaded
+        return DATA_REGISTRY.get_scaled_data(self.data_path, 10**9)
+
     def data_creation(self):
-        data = pd.read_csv(self.data_path, header=2)
-        data.drop(
-            columns=["Indicator Name", "Indicator Code", "Unnamed: 67", "Country Name"],
-            inplace=True,
-        )
-        data.rename(columns={"Country Code": "country_code"}, inplace=True)
-
-        data = data.melt(
-            id_vars=["country_code"], var_name="year", value_name=self.indicator_name
-        )
-        data = data.pivot(
-            index="year", columns="country_code", values=self.indicator_name
-        )
-
-        data.index = data.index.astype(int)
-        data = data / (10**9)
+        data = self.panel_creation().to_frame()
 
         return data
 
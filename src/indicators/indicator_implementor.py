@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
 
+from ..utils.panel import Panel
+from ..utils.instrumentation import instrument_methods
+
 
 class IndicatorImplementor(ABC):
     def __init__(self, indicator_name, dict_parameters=None):
@@ -7,6 +10,14 @@ class IndicatorImplementor(ABC):
         self.data_path = None
         self.dict_parameters = dict_parameters
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_methods(cls, {"data_creation": "data_creation"})
+
     @abstractmethod
     def data_creation(self):
         pass
+
+    def panel_creation(self):
+        """Returns the data as a compact Panel. Override to skip the pandas frame."""
+        return Panel.from_frame(self.data_creation())
@@ -0,0 +1,260 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .limit_process import get_aligned_limits, prefetch_data, process_limits
+from .utils.alignment import AlignmentIndex
+from .utils.f_base import batched_linear_interpolation
+
+
+class InverseProblem:
+    """Scores candidate coefs and limit curves against a target adjusted indicator.
+
+    A candidate is a flat parameter vector: the coef of every limit (when search_coefs),
+    then the x and f breakpoints of each limit of curve_limits. Only the points where
+    the target, the indicator and every limit have data are kept, so a batch of
+    candidates is scored on (candidates x points) arrays.
+
+    The adjusted indicator of a candidate is the one of process_limits:
+    indicator * sum(coef * f(limit data)), and its loss is the mean squared error to the
+    target.
+
+    Args:
+        indicator (pd.Series or pd.DataFrame): one country, or year x country.
+        dict_all_limits (dict): starting configuration, same format as in process_limits.
+        target (pd.Series or pd.DataFrame): target adjusted indicator, same shape as indicator.
+        search_coefs (bool): whether the coefs are searched.
+        curve_limits (iterable of str): limits whose list_points are searched. They
+            must be piecewise-linear (expose get_curve and get_aligned_data).
+    """
+
+    def __init__(
+        self, indicator, dict_all_limits, target, search_coefs=True, curve_limits=()
+    ):
+        self.dict_all_limits = dict_all_limits
+        self.search_coefs = search_coefs
+        self.limit_names = list(dict_all_limits.keys())
+        self.curve_limits = [name for name in self.limit_names if name in curve_limits]
+        prefetch_data(dict_all_limits)
+        alignment = AlignmentIndex.from_indicator(indicator)
+
+        indicator_values = indicator.to_numpy(dtype=float).reshape(len(indicator), -1)
+        target_values = (
+            target.reindex_like(indicator)
+            .to_numpy(dtype=float)
+            .reshape(indicator_values.shape)
+        )
+        list_limit_data = []
+        self.curves = {}
+        for limit_name, limit_implementor, limit_data, curve in get_aligned_limits(
+            indicator, dict_all_limits, alignment
+        ):
+            list_limit_data.append(limit_data)
+            if limit_name in self.curve_limits:
+                if curve is None:
+                    raise ValueError(
+                        f"Limit {limit_name} ({dict_all_limits[limit_name]['config']}) "
+                        "has no piecewise-linear curve to search"
+                    )
+                self.curves[limit_name] = curve
+            else:
+                self.curves[limit_name] = limit_implementor
+
+        mask = ~np.isnan(indicator_values) & ~np.isnan(target_values)
+        for limit_data in list_limit_data:
+            mask &= ~np.isnan(limit_data)
+        if not mask.any():
+            raise ValueError(
+                "No year where the target, the indicator and the limits all have data"
+            )
+        self.nb_points = int(mask.sum())
+        self.indicator_values = indicator_values[mask]
+        self.target_values = target_values[mask]
+        self.limit_data = [limit_data[mask] for limit_data in list_limit_data]
+        # The curves that are not searched give the same factor for every candidate
+        self.fixed_factors = {
+            limit_name: self.curves[limit_name].f_array(self.limit_data[k])
+            for k, limit_name in enumerate(self.limit_names)
+            if limit_name not in self.curve_limits
+        }
+
+    def get_initial_parameters(self):
+        parameters = []
+        if self.search_coefs:
+            parameters.extend(
+                self.dict_all_limits[name]["coef"] for name in self.limit_names
+            )
+        for limit_name in self.curve_limits:
+            parameters.extend(self.curves[limit_name].x_points)
+            parameters.extend(self.curves[limit_name].f_points)
+        return np.asarray(parameters, dtype=float)
+
+    def unpack(self, parameters):
+        """Splits (candidates x parameters) into coefs and sorted, clipped curves.
+
+        Returns:
+            tuple: coefs (candidates x limits) and {limit: (x_points, f_points)}.
+        """
+        parameters = np.atleast_2d(parameters)
+        nb_candidates = len(parameters)
+        start = 0
+        if self.search_coefs:
+            coefs = np.clip(parameters[:, : len(self.limit_names)], 0.0, None)
+            start = len(self.limit_names)
+        else:
+            coefs = np.tile(
+                [self.dict_all_limits[name]["coef"] for name in self.limit_names],
+                (nb_candidates, 1),
+            ).astype(float)
+
+        curves = {}
+        for limit_name in self.curve_limits:
+            nb_breakpoints = len(self.curves[limit_name].x_points)
+            x_points = parameters[:, start : start + nb_breakpoints]
+            f_points = np.clip(
+                parameters[:, start + nb_breakpoints : start + 2 * nb_breakpoints],
+                0.0,
+                1.0,
+            )
+            start += 2 * nb_breakpoints
+            order = np.argsort(x_points, axis=1)
+            curves[limit_name] = (
+                np.take_along_axis(x_points, order, axis=1),
+                np.take_along_axis(f_points, order, axis=1),
+            )
+        return coefs, curves
+
+    def evaluate(self, parameters):
+        """Losses of a batch of candidates, shape (candidates,)."""
+        coefs, curves = self.unpack(parameters)
+        factor_sum = np.zeros((len(coefs), self.nb_points))
+        for k, limit_name in enumerate(self.limit_names):
+            if limit_name in curves:
+                x_points, f_points = curves[limit_name]
+                factor = batched_linear_interpolation(
+                    self.limit_data[k],
+                    x_points,
+                    f_points,
+                    self.curves[limit_name].penalty_coef,
+                )
+            else:
+                factor = self.fixed_factors[limit_name]
+            factor_sum += coefs[:, k, None] * factor
+        errors = factor_sum * self.indicator_values - self.target_values
+        return np.mean(errors**2, axis=1)
+
+    def to_config(self, parameters):
+        """dict_all_limits of one candidate."""
+        coefs, curves = self.unpack(parameters)
+        dict_all_limits = copy.deepcopy(self.dict_all_limits)
+        for k, limit_name in enumerate(self.limit_names):
+            dict_limit = dict_all_limits[limit_name]
+            dict_limit["coef"] = float(coefs[0, k])
+            if limit_name in curves:
+                x_points, f_points = curves[limit_name]
+                dict_parameters = dict(dict_limit.get("dict_parameters") or {})
+                dict_parameters["list_points"] = [
+                    (float(x), float(f)) for x, f in zip(x_points[0], f_points[0])
+                ]
+                dict_limit["dict_parameters"] = dict_parameters
+        return dict_all_limits
+
+
+def evaluate_parallel(problem, candidates, executor, chunk_size):
+    chunks = [
+        candidates[start : start + chunk_size]
+        for start in range(0, len(candidates), chunk_size)
+    ]
+    return np.concatenate(list(executor.map(problem.evaluate, chunks)))
+
+
+def solve_inverse(
+    indicator,
+    dict_all_limits,
+    target,
+    search_coefs=True,
+    curve_limits=(),
+    nb_candidates=2048,
+    nb_iterations=30,
+    elite_fraction=0.1,
+    initial_sigma=0.2,
+    seed=0,
+    max_workers=None,
+    chunk_size=256,
+    tolerance=1e-6,
+    indicator_name=None,
+):
+    """Finds the coefs and limit curves that bring the adjusted indicator closest to a target.
+
+    Cross-entropy search: at each iteration nb_candidates parameter vectors are drawn
+    from a normal distribution, scored in chunks of chunk_size on a thread pool (the
+    scoring is NumPy and releases the GIL), and the distribution is refitted on the best
+    elite_fraction of them. The starting configuration is part of the first batch, so
+    the result is never worse than it.
+
+    Coefs are kept non-negative and the f values of the curves within [0, 1].
+
+    Args:
+        indicator (pd.Series or pd.DataFrame): one country, or year x country.
+        dict_all_limits (dict): starting configuration, same format as in process_limits.
+        target (pd.Series or pd.DataFrame): target adjusted indicator, same shape as indicator.
+        search_coefs (bool): whether the coefs are searched.
+        curve_limits (iterable of str): limits whose list_points are searched.
+        nb_candidates (int): candidates scored per iteration.
+        nb_iterations (int): maximum number of iterations.
+        elite_fraction (float): share of the candidates the distribution is refitted on.
+        initial_sigma (float): initial standard deviation of every parameter.
+        seed (int): seed of the random generator.
+        max_workers (int, optional): number of threads. Defaults to the executor default.
+        chunk_size (int): candidates per scoring task.
+        tolerance (float): stop when every standard deviation is below it.
+        indicator_name (str, optional): name of the indicator. Defaults to indicator.name.
+
+    Returns:
+        dict: keys dict_all_limits (the best configuration), loss (its mean squared
+        error), history (best loss after each iteration) and indicator_adjusted
+        (process_limits on the best configuration).
+    """
+    if indicator_name is None:
+        indicator_name = indicator.name
+    problem = InverseProblem(
+        indicator,
+        dict_all_limits,
+        target,
+        search_coefs=search_coefs,
+        curve_limits=curve_limits,
+    )
+    rng = np.random.default_rng(seed)
+    mean = problem.get_initial_parameters()
+    sigma = np.full(mean.shape, initial_sigma)
+    nb_elites = max(2, int(nb_candidates * elite_fraction))
+
+    best_parameters = mean
+    best_loss = problem.evaluate(mean)[0]
+    history = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(nb_iterations):
+            candidates = mean + sigma * rng.standard_normal((nb_candidates, len(mean)))
+            losses = evaluate_parallel(problem, candidates, executor, chunk_size)
+            elites = candidates[np.argsort(losses)[:nb_elites]]
+            if np.nanmin(losses) < best_loss:
+                best_loss = np.nanmin(losses)
+                best_parameters = candidates[np.nanargmin(losses)]
+            history.append(float(best_loss))
+
+            mean = elites.mean(axis=0)
+            sigma = elites.std(axis=0)
+            if sigma.max() < tolerance:
+                break
+
+    best_config = problem.to_config(best_parameters)
+    return {
+        "dict_all_limits": best_config,
+        "loss": float(best_loss),
+        "history": history,
+        "indicator_adjusted": process_limits(
+            indicator, best_config, indicator_name=indicator_name
+        ),
+    }
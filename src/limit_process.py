@@ -1,25 +1,23 @@
-import importlib
+from concurrent.futures import ThreadPoolExecutor
 
-CONFIG_MAP = {
-    "water_general_wb": {
-        "module_name": "water_general_wb_limit",
-        "class_name": "WaterGeneralWBLimit",
-    }
-}
+import numpy as np
+import pandas as pd
+
+from .indicator_process import IndicatorImplementorFactory
+from .utils.alignment import AlignmentIndex
+from .utils.hashing import hash_data
+from .utils.instrumentation import stage
+from .utils.plugins import LIMIT_PLUGINS
+from .utils.registry import DATA_REGISTRY
 
 
 class LimitImplementorFactory:
     @staticmethod
     def get_implementor(config_name, limit_name, dict_parameters=None):
-        module_name = CONFIG_MAP[config_name]["module_name"]
-        class_name = CONFIG_MAP[config_name]["class_name"]
-        module_path = f".limits.{module_name}"  # Assuming all limit modules are in a 'limits' package
-
         try:
-            # Dynamically import the module
-            module = importlib.import_module(module_path, package="src")
-            # Get the class from the module
-            cls = getattr(module, class_name)
+            # Resolve the class registered under config_name, imported once per process
+            with stage("factory_resolution", config=config_name):
+                cls = LIMIT_PLUGINS.get(config_name)
             # Instantiate the class and return the instance
             return cls(
                 config_name, limit_name, dict_parameters
@@ -28,26 +26,125 @@ class LimitImplementorFactory:
             raise ImportError(f"Could not import {config_name} due to {e}")
 
 
-def process_limits(
-    indicator,
-    dict_all_limits,
-):
+def prefetch_data(dict_all_limits, indicator_name=None, max_workers=None):
+    """Loads every dataset a configuration needs concurrently, before any computation.
+
+    The limits (and the indicator) are instantiated to collect their data paths, then
+    one panel_creation per path not yet in DATA_REGISTRY runs on a thread pool: CSV
+    parsing and .npy reads release the GIL, so the total load time gets close to the
+    one of the slowest file. panel_creation also reads the out-of-core sources
+    (ChunkedSource), whose data_creation only builds the lazy source.
+
+    Args:
+        dict_all_limits (dict): format {"limit_1": {"coef": 1, "config": "config_limit_1"}}.
+        indicator_name (str, optional): indicator to load as well.
+        max_workers (int, optional): number of threads. Defaults to the number of files.
+    """
+    implementors = []
+    if indicator_name is not None:
+        implementors.append(IndicatorImplementorFactory.get_implementor(indicator_name))
+    for limit_name, dict_limit in dict_all_limits.items():
+        implementors.append(
+            LimitImplementorFactory.get_implementor(
+                config_name=dict_limit["config"],
+                limit_name=limit_name,
+                dict_parameters=dict_limit.get("dict_parameters"),
+            )
+        )
+
+    # One load per file, only for the files that are not in memory yet
+    dict_to_load = {}
+    for implementor in implementors:
+        data_path = implementor.data_path
+        if data_path is not None and not DATA_REGISTRY.contains(data_path):
+            dict_to_load.setdefault(data_path, implementor)
+    if not dict_to_load:
+        return
+    if len(dict_to_load) == 1:
+        next(iter(dict_to_load.values())).panel_creation()
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(dict_to_load)) as executor:
+        futures = [
+            executor.submit(implementor.panel_creation)
+            for implementor in dict_to_load.values()
+        ]
+        for future in futures:
+            future.result()
+
+
+def get_aligned_limits(indicator, dict_all_limits, alignment):
+    """Instantiates every limit and gathers its data on the grid of the indicator.
+
+    Shared by the batched engines (inverse solver, uncertainty, projection), which
+    evaluate the limit curves themselves instead of going through process_limits.
+
+    Args:
+        indicator (pd.Series or pd.DataFrame): one country, or year x country.
+        dict_all_limits (dict): same format as in process_limits.
+        alignment (AlignmentIndex): calendar of the run, built from the indicator.
+
+    Returns:
+        list of tuple: (limit_name, limit_implementor, limit_data, curve) per limit, in
+        the order of dict_all_limits. limit_data is a float array shaped
+        (nb_years, nb_countries), 1 column for a Series; curve is the one of get_curve,
+        None when f is not piecewise linear.
+    """
+    aligned_limits = []
+    for limit_name, dict_limit in dict_all_limits.items():
+        limit_implementor = LimitImplementorFactory.get_implementor(
+            config_name=dict_limit["config"],
+            limit_name=limit_name,
+            dict_parameters=dict_limit.get("dict_parameters"),
+        )
+        limit_data = limit_implementor.get_aligned_data(indicator, alignment)
+        aligned_limits.append(
+            (
+                limit_name,
+                limit_implementor,
+                np.asarray(limit_data, dtype=float).reshape(len(indicator), -1),
+                limit_implementor.get_curve(),
+            )
+        )
+    return aligned_limits
+
+
+def process_limits(indicator, dict_all_limits, indicator_name=None, cache=None):
     """Outputs all the calculations under certain limit configurations.
     Note that the configuration specifies the function f and its segmentation but does not specify parameters a priori.
 
+    The indicator is either one country (pd.Series indexed by year) or every country at
+    once (pd.DataFrame year x country, as built by data_creation). In the second case
+    each limit is computed for all countries in one aligned pass and the result has
+    two column levels, ('variable', 'country_code'): result["gdp_adjusted"] is a
+    year x country frame.
+
+    The adjusted indicator (indicator_name + "_adjusted") is the sum of the adjusted
+    sub-indicators, each weighted by its coef: indicator * sum(coef * f(limit data)).
+    It is NaN for the years where a limit has no data.
+
     Args:
-        pib_total (pd.DataFrame): index 'Year' and column 'PIB'
-        dict_limits_config (dict): format {"limit_1": {"coef": 1, "config": "config_limit_1"}}. Sum of coef must equal 1.
-        croissance_reelle (_type_, optional): _description_. Defaults to None.
+        indicator (pd.Series or pd.DataFrame): indicator indexed by year, named after the indicator.
+        dict_all_limits (dict): format {"limit_1": {"coef": 1, "config": "config_limit_1"}}. Sum of coef must equal 1.
+        indicator_name (str, optional): name of the indicator. Defaults to indicator.name.
+        cache (ContributionCache, optional): cache of the adjusted sub-indicators, so that
+            only the limits whose configuration changed are recomputed.
     """
-    indicator_name = indicator.name
-    indicator_adjusted = indicator.to_frame()
+    if indicator_name is None:
+        indicator_name = indicator.name
+    multi_country = isinstance(indicator, pd.DataFrame)
+
+    prefetch_data(dict_all_limits)
+
+    dict_columns = {indicator_name: indicator}
+    # Year and country positions are computed once per dataset for all the limits
+    alignment = AlignmentIndex.from_indicator(indicator)
+    if cache is not None:
+        indicator_hash = hash_data(indicator)
 
     for limit_name in dict_all_limits.keys():
         dict_limit = dict_all_limits[limit_name]
-        sub_indicator = indicator_adjusted.apply(
-            lambda row: row[indicator_name] * dict_limit["coef"], axis=1
-        ).to_frame(name="sub_" + indicator_name)
+        sub_indicator = indicator * dict_limit["coef"]
 
         if "dict_parameters" in dict_limit.keys():
             dict_parameters = dict_limit["dict_parameters"]
@@ -59,18 +156,53 @@ def process_limits(
             limit_name=limit_name,
             dict_parameters=dict_parameters,
         )
-        sub_indicator_adjusted = limit_implementor.calculate(indicator)
+        if cache is not None:
+            key = cache.get_key(dict_limit, limit_implementor, indicator_hash)
+            sub_indicator_adjusted = cache.get(key)
+        if cache is None or sub_indicator_adjusted is None:
+            sub_indicator_adjusted = (
+                limit_implementor.calculate_aligned(indicator, alignment)
+                * dict_limit["coef"]
+            )
+            if multi_country:
+                sub_indicator_adjusted = sub_indicator_adjusted.reindex(
+                    index=indicator.index, columns=indicator.columns
+                )
+            else:
+                sub_indicator_adjusted = sub_indicator_adjusted.reindex(indicator.index)
+            if cache is not None:
+                cache.set(key, sub_indicator_adjusted)
 
-        indicator_adjusted["sub_" + indicator_name + "_" + limit_name] = sub_indicator
-        indicator_adjusted["sub_" + indicator_name + "_adjusted_" + limit_name] = (
+        dict_columns["sub_" + indicator_name + "_" + limit_name] = sub_indicator
+        dict_columns["sub_" + indicator_name + "_adjusted_" + limit_name] = (
             sub_indicator_adjusted
         )
 
     adjusted_keys = [
-        "sub_" + indicator_name + "_" + key for key in dict_all_limits.keys()
+        "sub_" + indicator_name + "_adjusted_" + key for key in dict_all_limits.keys()
     ]
-    indicator_adjusted[indicator_name + "_adjusted"] = indicator_adjusted[
-        adjusted_keys
-    ].sum(axis=1)
+    # The adjusted indicator is only defined where every limit has data
+    with stage("aggregation", rows=len(indicator)):
+        indicator_adjusted = aggregate(
+            dict_columns, indicator, indicator_name, adjusted_keys
+        )
+
+    return indicator_adjusted
+
+
+def aggregate(dict_columns, indicator, indicator_name, adjusted_keys):
+    if isinstance(indicator, pd.DataFrame):
+        # NaN propagates through +, which matches sum(min_count=len(adjusted_keys))
+        dict_columns[indicator_name + "_adjusted"] = sum(
+            dict_columns[key] for key in adjusted_keys
+        )
+        indicator_adjusted = pd.concat(
+            dict_columns, axis=1, names=["variable", indicator.columns.name]
+        )
+    else:
+        indicator_adjusted = pd.DataFrame(dict_columns)
+        indicator_adjusted[indicator_name + "_adjusted"] = indicator_adjusted[
+            adjusted_keys
+        ].sum(axis=1, min_count=len(adjusted_keys))
 
     return indicator_adjusted
@@ -1,5 +1,12 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+import pandas as pd
+
+from ..utils.chunked import panel_from_data
+from ..utils.f_base import DEFAULT_NB_SAMPLES
+from ..utils.instrumentation import instrument_methods, instrumented, stage
+
 
 class LimitImplementor(ABC):
     def __init__(self, config_name, limit_name, dict_parameters=None):
@@ -8,10 +15,25 @@ class LimitImplementor(ABC):
         self.data_path = None
         self.dict_parameters = dict_parameters
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_methods(
+            cls,
+            {"data_creation": "data_creation", "calculate_aligned": "calculate"},
+        )
+
     @abstractmethod
     def data_creation(self):
+        """Returns the limit data: a year x country DataFrame, or for sources too large
+        for memory a ChunkedSource (or an iterator of long-format chunks), aggregated
+        to the year x country grain when panel_creation is called.
+        """
         pass
 
+    def panel_creation(self):
+        """Returns the data as a compact Panel. Override to skip the pandas frame."""
+        return panel_from_data(self.data_creation())
+
     @abstractmethod
     def f(self, point, dict_parameters=None):
         pass
@@ -19,3 +41,117 @@ class LimitImplementor(ABC):
     @abstractmethod
     def calculate(self, indicator):
         pass
+
+    @instrumented("calculate")
+    def calculate_aligned(self, indicator, alignment):
+        """Same as calculate, with the AlignmentIndex shared by all the limits of a run.
+
+        process_limits calls this method. The limit data is gathered on the grid of
+        the indicator with get_aligned_data, then adjusted in one vectorized pass.
+        """
+        return self.adjust(self.get_aligned_data(indicator, alignment), indicator)
+
+    def get_aligned_data(self, indicator, alignment):
+        """Limit values on the grid of the indicator, as an array shaped like it.
+
+        Gathered from panel_creation: all the countries of the indicator for a
+        DataFrame, dict_parameters["country_code"] for a Series. Also used by the
+        batched engines (uncertainty, inverse solver) that evaluate many curves on the
+        same data.
+        """
+        panel = self.panel_creation()
+
+        if isinstance(indicator, pd.DataFrame):
+            # All countries at once, on the indicator grid
+            country_codes = alignment.country_codes
+        else:
+            try:
+                country_code = self.dict_parameters["country_code"]
+            except (KeyError, TypeError) as e:
+                raise KeyError(
+                    f"Country code not specified for limit: {self.limit_name}"
+                ) from e
+            country_codes = [country_code]
+
+        with stage("alignment", limit=self.limit_name):
+            data = alignment.gather(
+                panel, country_codes, missing_years=self.get_missing_years()
+            )
+        return data.reshape(indicator.shape)
+
+    def get_curve(self):
+        """Returns the PiecewiseLinearCurve behind f, for the batched engines.
+
+        The default implementation returns None: f is not piecewise linear, so its
+        breakpoints cannot be perturbed or searched, and the batched engines evaluate
+        it as it is with f_array.
+        """
+        return None
+
+    def get_tabulation(self):
+        """Number of samples of the curve lookup table, or None to evaluate it exactly.
+
+        dict_parameters["tabulated"] is True (default grid, see TabulatedCurve) or a
+        number of samples.
+        """
+        tabulated = (self.dict_parameters or {}).get("tabulated")
+        if tabulated is True:
+            return DEFAULT_NB_SAMPLES
+        return tabulated or None
+
+    def get_tabulation_max_error(self):
+        """Largest error allowed for the curve lookup table, or None for no constraint.
+
+        dict_parameters["tabulated_max_error"]: the grid of the table is refined until
+        its error bound is below it (see TabulatedCurve).
+        """
+        return (self.dict_parameters or {}).get("tabulated_max_error")
+
+    def get_missing_years(self):
+        """Policy for the years without limit data: "skip", "ffill" or "interpolate"."""
+        if self.dict_parameters:
+            return self.dict_parameters.get("missing_years", "skip")
+        return "skip"
+
+    def f_array(self, points):
+        """Evaluates f on a whole array of points at once.
+
+        The default implementation falls back to calling f point by point; limits
+        whose curve can be expressed with NumPy should override it.
+
+        Args:
+            points (np.ndarray): limit values, any shape. NaN values are left as NaN.
+
+        Returns:
+            np.ndarray: f(points), same shape as points.
+        """
+        points = np.asarray(points, dtype=float)
+        result = np.full(points.shape, np.nan)
+        mask = ~np.isnan(points)
+        result[mask] = [self.f(point) for point in points[mask]]
+        return result
+
+    def adjust(self, limit_data, indicator_data):
+        """Applies the limit curve to an indicator in one vectorized pass.
+
+        Works on aligned Series (one country) or aligned year x country DataFrames
+        (several countries). Where the limit value is missing the result is NaN.
+
+        Args:
+            limit_data (pd.Series, pd.DataFrame or np.ndarray): limit values, aligned with
+                indicator_data.
+            indicator_data (pd.Series or pd.DataFrame): indicator values.
+
+        Returns:
+            pd.Series or pd.DataFrame: f(limit_data) * indicator_data, shaped like indicator_data.
+        """
+        with stage("curve_evaluation", rows=len(limit_data), limit=self.limit_name):
+            factor = self.f_array(
+                np.asarray(limit_data, dtype=float).reshape(indicator_data.shape)
+            )
+        values = factor * indicator_data.to_numpy(dtype=float)
+        if isinstance(indicator_data, pd.DataFrame):
+            return pd.DataFrame(
+                values, index=indicator_data.index, columns=indicator_data.columns
+            )
+        return pd.Series(values, index=indicator_data.index)
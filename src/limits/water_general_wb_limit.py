@@ -1,59 +1,62 @@
 from .limit_implementor import LimitImplementor
-from ..utils.f_base import linear_interpolation
-import pandas as pd
+from ..utils.alignment import AlignmentIndex
+from ..utils.f_base import (
+    get_tabulated_curve,
+    linear_interpolation,
+    PiecewiseLinearCurve,
+)
+from ..utils.plugins import register_limit
+from ..utils.registry import DATA_REGISTRY
 
 
+@register_limit("water_general_wb")
 class WaterGeneralWBLimit(LimitImplementor):
     def __init__(self, config_name, limit_name, dict_parameters=None):
         super().__init__(config_name, limit_name, dict_parameters=dict_parameters)
 
         self.data_path = "data/eau/eau.csv"
 
-    def data_creation(self):
-        data = pd.read_csv(self.data_path, header=2)
-        data.drop(
-            columns=["Indicator Name", "Indicator Code", "Unnamed: 68", "Country Name"],
-            inplace=True,
-        )
-        data.rename(columns={"Country Code": "country_code"}, inplace=True)
+    def panel_creation(self):
+        # Percentages, scaled once when loaded
+        return DATA_REGISTRY.get_scaled_data(self.data_path, 100)
 
-        data = data.melt(id_vars=["country_code"], var_name="year", value_name="water")
-        data = data.pivot(index="year", columns="country_code", values="water")
-
-        data.index = data.index.astype(int)
-        data = data / 100
+    def data_creation(self):
+        data = self.panel_creation().to_frame()
 
         return data
 
-    def f(self, point):
-        if point is None:
-            return None
-
+    def get_list_points(self):
         list_points = [(0.5, 1), (0.7, 0.8), (0.8, 0.7), (0.9, 0.5), (1, 0)]
         if self.dict_parameters:
             if "list_points" in self.dict_parameters.keys():
                 list_points = self.dict_parameters["list_points"]
-        result = linear_interpolation(point, list_points)
+        return list_points
+
+    def get_curve(self):
+        list_points = tuple(tuple(point) for point in self.get_list_points())
+        nb_samples = self.get_tabulation()
+        if nb_samples:
+            return get_tabulated_curve(
+                list_points,
+                nb_samples=nb_samples,
+                max_error=self.get_tabulation_max_error(),
+            )
+        if getattr(self, "_curve_points", None) != list_points:
+            self._curve = PiecewiseLinearCurve(list_points)
+            self._curve_points = list_points
+        return self._curve
+
+    def f(self, point):
+        if point is None:
+            return None
+
+        result = linear_interpolation(point, self.get_list_points())
         return result
 
+    def f_array(self, points):
+        return self.get_curve()(points)
+
     def calculate(self, indicator):
-        indicator_name = indicator.name
-        data = self.data_creation()
-        try:
-            country_code = self.dict_parameters["country_code"]
-        except KeyError as e:
-            print(f"Country code not specified for limit: {self.limit_name}")
-
-        data = data[country_code]
-        data.rename("water", inplace=True).to_frame()
-        df = pd.concat([data, indicator], axis=1)
-
-        def adjustment(row):
-            if pd.isna(row["water"]):
-                return None
-            else:
-                return self.f(row["water"]) * row[indicator_name]
-
-        indicator_adjusted = df.apply(adjustment, axis=1)
-
-        return indicator_adjusted
+        return self.calculate_aligned(
+            indicator, AlignmentIndex.from_indicator(indicator)
+        )
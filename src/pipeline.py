@@ -0,0 +1,72 @@
+from .indicator_process import IndicatorImplementorFactory
+from .limit_process import LimitImplementorFactory, prefetch_data, process_limits
+from .utils.result_cache import ResultCache
+
+
+def get_default_limits(country_code="FRA"):
+    """Default configuration: the water limit only, for country_code."""
+    return {
+        "water": {
+            "coef": 1.0,
+            "config": "water_general_wb",
+            "dict_parameters": {"country_code": country_code},
+        }
+    }
+
+
+def get_source_paths(dict_all_limits, indicator_name):
+    data_paths = [IndicatorImplementorFactory.get_implementor(indicator_name).data_path]
+    for limit_name, dict_limit in dict_all_limits.items():
+        data_paths.append(
+            LimitImplementorFactory.get_implementor(
+                config_name=dict_limit["config"],
+                limit_name=limit_name,
+                dict_parameters=dict_limit.get("dict_parameters"),
+            ).data_path
+        )
+    return [data_path for data_path in data_paths if data_path is not None]
+
+
+def process_all(
+    dict_all_limits,
+    indicator_name,
+    country_code="FRA",
+    cache=None,
+    result_cache=None,
+):
+    """Adjusts an indicator under all the limits of dict_all_limits.
+
+    With country_code=None every country is processed at once and the result has
+    ('variable', 'country_code') columns, see process_limits. cache is an optional
+    ContributionCache reused between calls. result_cache is an optional ResultCache
+    (or True for the default one) checked before computing anything.
+    """
+    if result_cache is True:
+        result_cache = ResultCache()
+    if result_cache is not None:
+        key = result_cache.get_key(
+            indicator_name,
+            country_code,
+            dict_all_limits,
+            get_source_paths(dict_all_limits, indicator_name),
+        )
+        indicator_adjusted_data = result_cache.get(key)
+        if indicator_adjusted_data is not None:
+            return indicator_adjusted_data
+
+    # Load the indicator and every limit dataset concurrently
+    prefetch_data(dict_all_limits, indicator_name=indicator_name)
+
+    indicator_data = IndicatorImplementorFactory.get_implementor(
+        indicator_name
+    ).data_creation()
+    if country_code is not None:
+        indicator_data = indicator_data[country_code]
+        indicator_data = indicator_data.rename(indicator_name)
+
+    indicator_adjusted_data = process_limits(
+        indicator_data, dict_all_limits, indicator_name=indicator_name, cache=cache
+    )
+    if result_cache is not None:
+        result_cache.set(key, indicator_adjusted_data)
+    return indicator_adjusted_data
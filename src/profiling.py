@@ -0,0 +1,366 @@
+"""Time and memory profile of a pipeline run, for the notebook workflow.
+
+    from src.profiling import profile_run
+    profile_run({"country_code": "FRA", "plot": True})
+
+shows, per pipeline stage, the calls and time spent (nested as in a flame graph), the
+peak memory, the number of explicit DataFrame and Series copies (NDFrame.copy calls)
+and the hit ratio of the caches. In a notebook the report renders as an HTML table;
+elsewhere print it.
+
+The magic is loaded with %load_ext src.profiling:
+
+    %gdp_profile config              profiles profile_run(config)
+    %%gdp_profile                    profiles the code of the cell
+"""
+
+import html
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+from .utils.contribution_cache import ContributionCache
+from .utils.instrumentation import TRACER, stage
+from .utils.registry import DATA_REGISTRY
+
+DEFAULT_CONFIG = {
+    "indicator_name": "gdp",
+    "country_code": "FRA",
+    "dict_all_limits": None,
+    "plot": False,
+    "cold": False,
+}
+
+
+def get_flame(events):
+    """Aggregates the stage events by call path ('process_all;calculate;alignment').
+
+    A stage is nested in the stages of the same thread that enclose it in time.
+
+    Returns:
+        list of dict: keys path, depth, tid, calls, wall_s and self_s, in order of first
+        call.
+    """
+    dict_flame = {}
+    for tid in sorted({event["tid"] for event in events}):
+        thread_events = sorted(
+            (event for event in events if event["tid"] == tid),
+            key=lambda event: (event["start_s"], -event["wall_s"]),
+        )
+        stack = []
+        for event in thread_events:
+            end_s = event["start_s"] + event["wall_s"]
+            while stack and stack[-1][1] < end_s - 1e-9:
+                stack.pop()
+            path = ";".join([entry[0] for entry in stack] + [event["name"]])
+            node = dict_flame.setdefault(
+                path,
+                {
+                    "path": path,
+                    "depth": len(stack),
+                    "tid": tid,
+                    "calls": 0,
+                    "wall_s": 0.0,
+                    "self_s": 0.0,
+                },
+            )
+            node["calls"] += 1
+            node["wall_s"] += event["wall_s"]
+            node["self_s"] += event["wall_s"]
+            if stack:
+                dict_flame[stack[-1][2]]["self_s"] -= event["wall_s"]
+            stack.append((event["name"], end_s, path))
+    return list(dict_flame.values())
+
+
+def counted_copy(frame, *args, **kwargs):
+    # Installed as NDFrame.copy while a CopyCounter is active, in any thread
+    for copy_counter in getattr(CopyCounter.local, "active", ()):
+        name = type(frame).__name__
+        copy_counter.counts[name] = copy_counter.counts.get(name, 0) + 1
+    return CopyCounter.original_copy(frame, *args, **kwargs)
+
+
+class CopyCounter:
+    """Counts the explicit DataFrame and Series copies (NDFrame.copy calls) of a thread.
+
+    NDFrame.copy is patched once for the process by the first active counter and
+    restored by the last one, under a lock. Only the copies made by the thread that
+    entered a counter are counted, so concurrent threads (e.g. the server workers) do
+    not count into each other. Copies made implicitly inside pandas are not seen.
+    """
+
+    lock = threading.Lock()
+    nb_active = 0
+    original_copy = None
+    local = threading.local()
+
+    def __init__(self):
+        self.counts = {}
+
+    def __enter__(self):
+        cls = type(self)
+        with cls.lock:
+            if cls.nb_active == 0:
+                cls.original_copy = pd.core.generic.NDFrame.copy
+                pd.core.generic.NDFrame.copy = counted_copy
+            cls.nb_active += 1
+        if not hasattr(cls.local, "active"):
+            cls.local.active = []
+        cls.local.active.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        cls = type(self)
+        cls.local.active.remove(self)
+        with cls.lock:
+            cls.nb_active -= 1
+            if cls.nb_active == 0:
+                pd.core.generic.NDFrame.copy = cls.original_copy
+
+
+def get_cache_ratios(stats_before, stats_after):
+    ratios = {}
+    for name, after in stats_after.items():
+        before = stats_before.get(name, {})
+        hits = after.get("hits", 0) - before.get("hits", 0)
+        misses = after.get("misses", 0) - before.get("misses", 0)
+        ratios[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        }
+    return ratios
+
+
+class ProfileReport:
+    """Result of profile_call: printable as text, rendered as HTML in notebooks."""
+
+    def __init__(self, wall_s, events, peak_memory_bytes, copies, caches, tid=None):
+        self.wall_s = wall_s
+        self.events = events
+        self.flame = get_flame(events)
+        # Time of the calling thread spent outside any stage (imports, user code...)
+        self.untracked_s = wall_s - sum(
+            node["wall_s"]
+            for node in self.flame
+            if node["depth"] == 0 and node["tid"] == tid
+        )
+        self.peak_memory_bytes = peak_memory_bytes
+        self.copies = copies
+        self.caches = caches
+        self.result = None
+
+    def to_dict(self):
+        return {
+            "wall_s": self.wall_s,
+            "untracked_s": self.untracked_s,
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "flame": self.flame,
+            "copies": self.copies,
+            "caches": self.caches,
+        }
+
+    def get_lines(self):
+        lines = [
+            f"Total {self.wall_s * 1000:.1f} ms, "
+            f"peak memory {self.peak_memory_bytes / 1024**2:.1f} MiB",
+            "",
+            f"{'stage':<48}{'calls':>7}{'total ms':>11}{'self ms':>10}{'share':>8}",
+        ]
+        for node in self.flame:
+            name = "  " * node["depth"] + node["path"].rsplit(";", 1)[-1]
+            share = node["wall_s"] / self.wall_s if self.wall_s else 0.0
+            lines.append(
+                f"{name:<48}{node['calls']:>7}{node['wall_s'] * 1000:>11.2f}"
+                f"{node['self_s'] * 1000:>10.2f}{share:>8.1%}"
+            )
+        lines.append(f"{'(outside the stages)':<55}{self.untracked_s * 1000:>11.2f}")
+        lines.append("")
+        copies = ", ".join(f"{name}: {count}" for name, count in self.copies.items())
+        lines.append(f"Explicit copies (NDFrame.copy calls): {copies or 'none'}")
+        for name, cache in self.caches.items():
+            ratio = cache["hit_ratio"]
+            ratio = "n/a" if ratio is None else f"{ratio:.0%}"
+            lines.append(
+                f"Cache {name}: {cache['hits']} hits, "
+                f"{cache['misses']} misses ({ratio})"
+            )
+        return lines
+
+    def to_text(self):
+        return "\n".join(self.get_lines())
+
+    def to_html(self):
+        rows = []
+        for node in self.flame:
+            share = node["wall_s"] / self.wall_s if self.wall_s else 0.0
+            name = html.escape(node["path"].rsplit(";", 1)[-1])
+            indent = f"padding-left:{node['depth'] * 1.5}em"
+            bar = f"background:#e8743b;height:0.8em;width:{share * 10:.2f}em"
+            rows.append(
+                f"<tr><td style='{indent};text-align:left'>{name}</td>"
+                f"<td>{node['calls']}</td>"
+                f"<td>{node['wall_s'] * 1000:.2f}</td>"
+                f"<td>{node['self_s'] * 1000:.2f}</td>"
+                f"<td style='text-align:left'><div style='{bar}'></div></td></tr>"
+            )
+        rows.append(
+            "<tr><td style='text-align:left'><i>outside the stages</i></td><td></td>"
+            f"<td>{self.untracked_s * 1000:.2f}</td><td></td><td></td></tr>"
+        )
+        caches = "".join(
+            f"<li>{html.escape(name)}: {cache['hits']} hits, "
+            f"{cache['misses']} misses</li>"
+            for name, cache in self.caches.items()
+        )
+        copies = ", ".join(f"{name}: {count}" for name, count in self.copies.items())
+        return (
+            f"<p><b>Total {self.wall_s * 1000:.1f} ms</b>, "
+            f"peak memory {self.peak_memory_bytes / 1024**2:.1f} MiB</p>"
+            "<table><tr><th>stage</th><th>calls</th><th>total ms</th>"
+            f"<th>self ms</th><th>share</th></tr>{''.join(rows)}</table>"
+            "<p>Explicit copies (NDFrame.copy calls): "
+            f"{html.escape(copies or 'none')}</p><ul>{caches}</ul>"
+        )
+
+    def save(self, path):
+        """Writes the report as HTML (.html) or text (any other extension)."""
+        with open(path, "w") as file:
+            file.write(self.to_html() if path.endswith(".html") else self.to_text())
+
+    def _repr_html_(self):
+        return self.to_html()
+
+    def __str__(self):
+        return self.to_text()
+
+
+def profile_call(function, *args, caches=None, **kwargs):
+    """Runs function(*args, **kwargs) with tracing, tracemalloc and copy counting.
+
+    The tracer state is restored afterwards, so profiling inside a traced session
+    keeps the session trace.
+
+    Args:
+        function (callable): code to profile.
+        caches (dict, optional): {name: cache} of objects whose stats() returns hits
+            and misses. DATA_REGISTRY is always included.
+
+    Returns:
+        tuple: the result of the function and its ProfileReport.
+    """
+    caches = {"data_registry": DATA_REGISTRY, **(caches or {})}
+    stats_before = {name: cache.stats() for name, cache in caches.items()}
+
+    was_enabled, was_memory = TRACER.enabled, TRACER.memory
+    previous_events = TRACER.get_events()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    memory_start = tracemalloc.get_traced_memory()[0]
+    TRACER.clear()
+    TRACER.enable(memory=True)
+
+    try:
+        with CopyCounter() as copy_counter:
+            wall_start = time.perf_counter()
+            result = function(*args, **kwargs)
+            wall_s = time.perf_counter() - wall_start
+        events = TRACER.get_events()
+        peak_memory_bytes = tracemalloc.get_traced_memory()[1] - memory_start
+        report = ProfileReport(
+            wall_s,
+            events,
+            peak_memory_bytes,
+            dict(copy_counter.counts),
+            get_cache_ratios(
+                stats_before, {name: cache.stats() for name, cache in caches.items()}
+            ),
+            tid=threading.get_ident(),
+        )
+    finally:
+        TRACER.clear()
+        for event in previous_events:
+            TRACER.record(event)
+        TRACER.enabled, TRACER.memory = was_enabled, was_memory
+        if not was_tracing:
+            tracemalloc.stop()
+    return result, report
+
+
+def run_config(config, cache):
+    from .pipeline import get_default_limits, process_all
+
+    dict_all_limits = config["dict_all_limits"]
+    if dict_all_limits is None:
+        dict_all_limits = get_default_limits(config["country_code"])
+    with stage("process_all"):
+        indicator_adjusted_data = process_all(
+            dict_all_limits,
+            indicator_name=config["indicator_name"],
+            country_code=config["country_code"],
+            cache=cache,
+        )
+
+    if config["plot"] and config["country_code"] is not None:
+        # The import of matplotlib is part of the rendering cost of a first plot
+        with stage("render"), tempfile.TemporaryDirectory() as directory:
+            from .utils import plotting
+
+            plotting.plot_indicator_with_all_limits(
+                indicator_adjusted=indicator_adjusted_data,
+                indicator_name=config["indicator_name"],
+                dict_limits_config=dict_all_limits,
+                output_path=os.path.join(directory, "profile.png"),
+            )
+    return indicator_adjusted_data
+
+
+def profile_run(config=None, cache=None):
+    """Profiles one run of the pipeline: process_all, then the plot if asked.
+
+    Args:
+        config (dict, optional): keys indicator_name ("gdp"), country_code ("FRA", None
+            for all countries), dict_all_limits (default: water only), plot (False: also
+            render the plot of main) and cold (False: drop the in-memory datasets first,
+            to include the loading).
+        cache (ContributionCache, optional): cache reused between runs. Defaults to a
+            new one.
+
+    Returns:
+        ProfileReport: the result of the run is in report.result.
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    if cache is None:
+        cache = ContributionCache()
+    if config["cold"]:
+        DATA_REGISTRY.invalidate()
+
+    result, report = profile_call(
+        run_config, config, cache, caches={"contribution_cache": cache}
+    )
+    report.result = result
+    return report
+
+
+def gdp_profile(line, cell=None):
+    from IPython import get_ipython
+
+    ipython = get_ipython()
+    if cell is None:
+        config = ipython.ev(line) if line.strip() else None
+        return profile_run(config)
+    _, report = profile_call(ipython.run_cell, cell)
+    return report
+
+
+def load_ipython_extension(ipython):
+    ipython.register_magic_function(
+        gdp_profile, magic_kind="line_cell", magic_name="gdp_profile"
+    )
@@ -0,0 +1,287 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from .indicator_process import IndicatorImplementorFactory
+from .limit_process import get_aligned_limits, prefetch_data
+from .utils.alignment import AlignmentIndex
+from .utils.hashing import hash_config
+from .utils.plugins import PROJECTION_PLUGINS, register_projection_model
+
+
+def get_projection_model(name, window=20):
+    try:
+        cls = PROJECTION_PLUGINS.get(name)
+    except KeyError:
+        raise ValueError(
+            f"Unknown projection model {name}, available: {PROJECTION_PLUGINS.names()}"
+        )
+    return cls(window=window)
+
+
+class ProjectionModel(ABC):
+    """Extends year x country series beyond their last known value.
+
+    Each country is fitted on its last window years of data, all countries at once, and
+    projected from its last known value with the fitted slope, so that the projection
+    continues the observed series without a jump. Countries with less than two known
+    values in the window are projected as NaN.
+
+    Subclasses implement get_slopes and project.
+
+    Args:
+        window (int): number of years the slope is fitted on.
+    """
+
+    def __init__(self, window=20):
+        self.window = window
+
+    def fit(self, years, values):
+        """
+        Args:
+            years (np.ndarray): shape (nb_years,).
+            values (np.ndarray): shape (nb_years, nb_countries), NaN if missing.
+        """
+        known = ~np.isnan(values)
+        has_value = known.any(axis=0)
+        last_positions = len(years) - 1 - np.argmax(known[::-1], axis=0)
+        self.last_years = np.where(has_value, years[last_positions], -1)
+        self.last_values = np.where(
+            has_value, values[last_positions, np.arange(values.shape[1])], np.nan
+        )
+        mask = known & (years[:, None] > self.last_years - self.window)
+        self.slopes = self.get_slopes(years, values, mask)
+        self.slopes = np.where(mask.sum(axis=0) >= 2, self.slopes, np.nan)
+        return self
+
+    @abstractmethod
+    def get_slopes(self, years, values, mask):
+        """Slope of each country on the masked values, shape (nb_countries,)."""
+        pass
+
+    @abstractmethod
+    def project(self, years):
+        """Projected values, shape (len(years), nb_countries)."""
+        pass
+
+
+def masked_regression_slopes(years, values, mask):
+    # Least-squares slope of values against years, column by column, on the mask only
+    with np.errstate(invalid="ignore", divide="ignore"):
+        nb_points = mask.sum(axis=0)
+        t = np.where(mask, years[:, None].astype(float), 0.0)
+        y = np.where(mask, values, 0.0)
+        t_mean = t.sum(axis=0) / nb_points
+        y_mean = y.sum(axis=0) / nb_points
+        t_centered = np.where(mask, t - t_mean, 0.0)
+        return (t_centered * (y - y_mean)).sum(axis=0) / (t_centered**2).sum(axis=0)
+
+
+@register_projection_model("constant_growth")
+class ConstantGrowthModel(ProjectionModel):
+    """Compound growth at the average rate between the first and last values of the window."""
+
+    def get_slopes(self, years, values, mask):
+        first_positions = np.argmax(mask, axis=0)
+        first_years = years[first_positions]
+        first_values = values[first_positions, np.arange(values.shape[1])]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.log(self.last_values / first_values) / (
+                self.last_years - first_years
+            )
+
+    def project(self, years):
+        elapsed = years[:, None] - self.last_years
+        return self.last_values * np.exp(self.slopes * elapsed)
+
+
+@register_projection_model("linear_trend")
+class LinearTrendModel(ProjectionModel):
+    """Constant yearly increment, the least-squares slope of the window."""
+
+    def get_slopes(self, years, values, mask):
+        return masked_regression_slopes(years, values, mask)
+
+    def project(self, years):
+        elapsed = years[:, None] - self.last_years
+        return self.last_values + self.slopes * elapsed
+
+
+@register_projection_model("log_trend")
+class LogTrendModel(ProjectionModel):
+    """Constant growth rate, the least-squares slope of the log of the positive values."""
+
+    def get_slopes(self, years, values, mask):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            log_values = np.log(values)
+        return masked_regression_slopes(years, log_values, mask & (values > 0))
+
+    def project(self, years):
+        elapsed = years[:, None] - self.last_years
+        return self.last_values * np.exp(self.slopes * elapsed)
+
+
+class ProjectedSeries:
+    """A year x country series on a calendar running to the projection horizon.
+
+    The known values are kept up to the last known year of each country and the model
+    projection is used after it.
+
+    Args:
+        values (np.ndarray): shape (nb_years, nb_countries), on the calendar years, NaN
+            where unknown. The model is fitted on them.
+        years (np.ndarray): the calendar, shape (nb_years,).
+        model (ProjectionModel): model to fit.
+        history (np.ndarray, optional): values returned up to the last known year, for
+            instance with the gaps filled. Defaults to values.
+    """
+
+    def __init__(self, values, years, model, history=None):
+        self.values = values if history is None else history
+        self.years = years
+        self.model = model.fit(years, values)
+
+    def get_chunk(self, start, stop):
+        years = self.years[start:stop]
+        projected = years[:, None] > self.model.last_years
+        if not projected.any():
+            return self.values[start:stop]
+        return np.where(projected, self.model.project(years), self.values[start:stop])
+
+
+def project_adjusted(
+    dict_all_limits,
+    indicator_name="gdp",
+    country_codes=None,
+    to_year=2100,
+    indicator_model="constant_growth",
+    limit_models=None,
+    window=20,
+    chunk_years=16,
+):
+    """Projects the indicator and the limits to to_year and adjusts the projection.
+
+    Every series is fitted once, all countries at once (see ProjectionModel), then the
+    calendar is walked by chunks of chunk_years: a chunk of each series is projected and
+    fed to the limit curves of every scenario, and only the adjusted result is kept.
+    The adjustment is the one of process_limits: indicator * sum(coef * f(limit)), NaN
+    where a limit is missing.
+
+    Args:
+        dict_all_limits (dict or list of dict): one configuration, same format as in
+            process_limits, or several scenarios sharing the same limit names.
+        indicator_name (str): name of the indicator.
+        country_codes (list of str, optional): countries to project. Defaults to all the
+            countries of the indicator.
+        to_year (int): last projected year.
+        indicator_model (str): name of the model of the indicator, registered with
+            register_projection_model.
+        limit_models (dict, optional): format {"water": "linear_trend"}. Limits missing
+            from it use "linear_trend".
+        window (int): number of years the models are fitted on.
+        chunk_years (int): number of years evaluated at a time.
+
+    Returns:
+        pd.DataFrame: index year, from the first year of the indicator to to_year.
+        Columns ('variable', 'country_code') with the variables indicator_name and
+        indicator_name + "_adjusted"; for a list of scenarios the first column level is
+        the position of the scenario instead of 'variable' and only the adjusted
+        indicator is returned.
+    """
+    list_dict_all_limits = (
+        dict_all_limits if isinstance(dict_all_limits, list) else [dict_all_limits]
+    )
+    limit_models = limit_models or {}
+    for scenario_limits in list_dict_all_limits:
+        prefetch_data(scenario_limits, indicator_name=indicator_name)
+
+    indicator_panel = IndicatorImplementorFactory.get_implementor(
+        indicator_name
+    ).panel_creation()
+    if country_codes is None:
+        country_codes = indicator_panel.country_codes.tolist()
+    years = np.arange(int(indicator_panel.years[0]), to_year + 1)
+    alignment = AlignmentIndex(years, country_codes)
+
+    # The history of the indicator on the projection calendar, NaN after its last year
+    indicator_history = pd.DataFrame(
+        alignment.gather(indicator_panel), index=years, columns=country_codes
+    )
+    indicator_series = ProjectedSeries(
+        indicator_history.to_numpy(),
+        years,
+        get_projection_model(indicator_model, window),
+    )
+    # The limit data does not depend on the curve or coef of a scenario: one projection
+    # per limit data source (config and dict_parameters) and model
+    dict_limit_series = {}
+    list_implementors = []
+    list_series_keys = []
+    for scenario_limits in list_dict_all_limits:
+        implementors = {}
+        series_keys = {}
+        # The history gathered with the missing years policy of each limit
+        for limit_name, limit_implementor, history, _ in get_aligned_limits(
+            indicator_history, scenario_limits, alignment
+        ):
+            dict_limit = scenario_limits[limit_name]
+            implementors[limit_name] = limit_implementor
+            model_name = limit_models.get(limit_name, "linear_trend")
+            key = hash_config(
+                dict_limit["config"], dict_limit.get("dict_parameters"), model_name
+            )
+            series_keys[limit_name] = key
+            if key not in dict_limit_series:
+                # The models are fitted on the known years only, the missing years
+                # policy fills the gaps of the history
+                dict_limit_series[key] = ProjectedSeries(
+                    alignment.gather(limit_implementor.panel_creation()),
+                    years,
+                    get_projection_model(model_name, window),
+                    history=history,
+                )
+        list_implementors.append(implementors)
+        list_series_keys.append(series_keys)
+
+    indicator_values = np.empty((len(years), len(country_codes)))
+    adjusted_values = np.empty(
+        (len(list_dict_all_limits), len(years), len(country_codes))
+    )
+    for start in range(0, len(years), chunk_years):
+        stop = min(start + chunk_years, len(years))
+        indicator_chunk = indicator_series.get_chunk(start, stop)
+        limit_chunks = {
+            key: series.get_chunk(start, stop)
+            for key, series in dict_limit_series.items()
+        }
+        indicator_values[start:stop] = indicator_chunk
+        for k, scenario_limits in enumerate(list_dict_all_limits):
+            factor_sum = np.zeros(indicator_chunk.shape)
+            for limit_name, dict_limit in scenario_limits.items():
+                limit_chunk = limit_chunks[list_series_keys[k][limit_name]]
+                factor_sum += dict_limit["coef"] * list_implementors[k][
+                    limit_name
+                ].f_array(limit_chunk)
+            adjusted_values[k, start:stop] = factor_sum * indicator_chunk
+
+    index = pd.Index(years, name="year")
+    if isinstance(dict_all_limits, list):
+        columns = pd.MultiIndex.from_product(
+            [range(len(list_dict_all_limits)), country_codes],
+            names=["scenario", "country_code"],
+        )
+        return pd.DataFrame(
+            adjusted_values.transpose(1, 0, 2).reshape(len(years), -1),
+            index=index,
+            columns=columns,
+        )
+    columns = pd.MultiIndex.from_product(
+        [[indicator_name, indicator_name + "_adjusted"], country_codes],
+        names=["variable", "country_code"],
+    )
+    return pd.DataFrame(
+        np.concatenate([indicator_values, adjusted_values[0]], axis=1),
+        index=index,
+        columns=columns,
+    )
@@ -0,0 +1,202 @@
+import copy
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .indicator_process import IndicatorImplementorFactory
+from .limit_process import process_limits
+from .sweep import warm_datasets
+from .utils.contribution_cache import ContributionCache
+from .utils.hashing import hash_config
+
+
+class QueryError(ValueError):
+    pass
+
+
+class QueryService:
+    """Answers adjusted-indicator queries on datasets kept in memory.
+
+    The indicators and limit datasets are loaded once, when the service starts, and
+    every query runs process_limits on them. Identical queries that arrive while one is
+    being computed share its result instead of being computed again, and at most
+    max_workers queries are computed at a time; beyond max_pending waiting queries new
+    ones are refused.
+
+    A query is a dict {"indicator_name": "gdp", "country_code": "FRA",
+    "dict_all_limits": {...}}. country_code=None adjusts every country at once.
+
+    Args:
+        indicator_names (iterable of str): indicators to load at startup.
+        limit_configs (iterable of str): limit configs whose data is loaded at startup.
+        max_workers (int): number of queries computed concurrently.
+        max_pending (int): number of distinct queries accepted at once.
+    """
+
+    def __init__(
+        self, indicator_names=("gdp",), limit_configs=(), max_workers=4, max_pending=64
+    ):
+        warm_datasets(indicator_names, limit_configs)
+        self.indicator_data = {}
+        for indicator_name in indicator_names:
+            self.get_indicator_data(indicator_name)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_pending = max_pending
+        self.contribution_cache = ContributionCache()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.coalesced = 0
+
+    def get_indicator_data(self, indicator_name):
+        # Concurrent first loads of the same indicator are harmless: the data itself
+        # comes from DATA_REGISTRY
+        if indicator_name not in self.indicator_data:
+            self.indicator_data[indicator_name] = (
+                IndicatorImplementorFactory.get_implementor(
+                    indicator_name
+                ).data_creation()
+            )
+        return self.indicator_data[indicator_name]
+
+    def compute(self, query):
+        indicator_name = query.get("indicator_name", "gdp")
+        country_code = query.get("country_code")
+        dict_all_limits = copy.deepcopy(query.get("dict_all_limits") or {})
+        if not dict_all_limits:
+            raise QueryError("dict_all_limits is required")
+
+        indicator_data = self.get_indicator_data(indicator_name)
+        if country_code is not None:
+            if country_code not in indicator_data.columns:
+                raise QueryError(f"Unknown country code: {country_code}")
+            indicator_data = indicator_data[country_code].rename(indicator_name)
+            # The country of the query wins over the one stored with a limit
+            for dict_limit in dict_all_limits.values():
+                dict_parameters = dict(dict_limit.get("dict_parameters") or {})
+                dict_parameters["country_code"] = country_code
+                dict_limit["dict_parameters"] = dict_parameters
+
+        return process_limits(
+            indicator_data,
+            dict_all_limits,
+            indicator_name=indicator_name,
+            cache=self.contribution_cache,
+        )
+
+    def submit(self, query):
+        """Returns the future of a query, shared with the identical queries in flight."""
+        key = hash_config(query)
+        with self.lock:
+            self.queries += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if len(self.in_flight) >= self.max_pending:
+                raise OverflowError("Too many pending queries")
+            future = self.executor.submit(self.compute, query)
+            self.in_flight[key] = future
+
+        def release(_):
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+        future.add_done_callback(release)
+        return future
+
+    def query(self, query, timeout=None):
+        return self.submit(query).result(timeout=timeout)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "queries": self.queries,
+                "coalesced": self.coalesced,
+                "in_flight": len(self.in_flight),
+                "indicators": sorted(self.indicator_data),
+                "contribution_cache": self.contribution_cache.stats(),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: POST /query, GET /stats and GET /health."""
+
+    service = None
+    timeout_seconds = 60
+
+    def send_json(self, status, body):
+        payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self.send_json(200, self.service.stats())
+        else:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/query":
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            query = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(query, dict):
+                raise QueryError("The query must be a JSON object")
+            result = self.service.query(query, timeout=self.timeout_seconds)
+            # Columns are flattened so that the multi-country results serialize as well
+            result = result.copy()
+            result.columns = [
+                "/".join(map(str, column)) if isinstance(column, tuple) else str(column)
+                for column in result.columns
+            ]
+            payload = result.to_json(orient="split")
+        except FutureTimeoutError:
+            self.send_json(
+                504, {"error": f"Query not computed within {self.timeout_seconds} s"}
+            )
+            return
+        except (ValueError, KeyError, ImportError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except OverflowError as e:
+            self.send_json(503, {"error": str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self.send_json(200, payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(service, host="127.0.0.1", port=8000):
+    """Serves a QueryService over HTTP until interrupted.
+
+    Example:
+        curl -d '{"country_code": "FRA", "dict_all_limits": {...}}' localhost:8000/query
+    """
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
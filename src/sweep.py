@@ -0,0 +1,194 @@
+import copy
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from .indicator_process import IndicatorImplementorFactory
+from .limit_process import LimitImplementorFactory
+from .pipeline import process_all
+
+TIDY_COLUMNS = ["scenario_id", "country_code", "year", "variable", "value"]
+
+
+def build_grid(
+    dict_all_limits,
+    country_codes=("FRA",),
+    list_coefs=None,
+    dict_list_points=None,
+    indicator_name="gdp",
+):
+    """Builds the scenarios of a sensitivity study as the product of all the variants.
+
+    Args:
+        dict_all_limits (dict): base configuration, same format as in process_limits.
+        country_codes (iterable of str): countries to run.
+        list_coefs (list of dict, optional): coef variants, format [{"water": 0.5, "co2": 0.5}, ...].
+            Limits missing from a variant keep their base coef.
+        dict_list_points (dict, optional): curve variants per limit, format {"water": [list_points_1, ...]}.
+        indicator_name (str): name of the indicator.
+
+    Returns:
+        list of dict: scenarios with keys scenario_id, indicator_name, country_code and dict_all_limits.
+    """
+    list_coefs = list_coefs or [{}]
+    dict_list_points = dict_list_points or {}
+    curve_limits = list(dict_list_points.keys())
+    curve_variants = list(
+        itertools.product(*[dict_list_points[limit] for limit in curve_limits])
+    )
+
+    scenarios = []
+    for country_code, coefs, curves in itertools.product(
+        country_codes, list_coefs, curve_variants
+    ):
+        scenario_limits = copy.deepcopy(dict_all_limits)
+        for limit_name, dict_limit in scenario_limits.items():
+            dict_parameters = dict(dict_limit.get("dict_parameters") or {})
+            dict_parameters["country_code"] = country_code
+            if limit_name in coefs:
+                dict_limit["coef"] = coefs[limit_name]
+            if limit_name in curve_limits:
+                dict_parameters["list_points"] = curves[curve_limits.index(limit_name)]
+            dict_limit["dict_parameters"] = dict_parameters
+
+        scenarios.append(
+            {
+                "scenario_id": len(scenarios),
+                "indicator_name": indicator_name,
+                "country_code": country_code,
+                "dict_all_limits": scenario_limits,
+            }
+        )
+    return scenarios
+
+
+def to_tidy(indicator_adjusted, scenario_id, country_code):
+    """Turns one process_all result (year x variable) into long format."""
+    tidy = (
+        indicator_adjusted.rename_axis(index="year", columns="variable")
+        .stack()
+        .rename("value")
+        .reset_index()
+    )
+    tidy.insert(0, "country_code", country_code)
+    tidy.insert(0, "scenario_id", scenario_id)
+    return tidy[TIDY_COLUMNS]
+
+
+def get_data_sources(scenarios):
+    """Returns the indicator names and limit configs needed by the scenarios."""
+    indicator_names = set()
+    limit_configs = set()
+    for scenario in scenarios:
+        indicator_names.add(scenario["indicator_name"])
+        for dict_limit in scenario["dict_all_limits"].values():
+            limit_configs.add(dict_limit["config"])
+    return sorted(indicator_names), sorted(limit_configs)
+
+
+def warm_datasets(indicator_names, limit_configs):
+    """Loads the datasets of the indicators and limit configs in the process-wide registry."""
+    for indicator_name in indicator_names:
+        IndicatorImplementorFactory.get_implementor(indicator_name).data_creation()
+    for config_name in limit_configs:
+        LimitImplementorFactory.get_implementor(
+            config_name=config_name, limit_name=config_name
+        ).data_creation()
+
+
+def run_scenarios(scenarios):
+    """Runs a chunk of scenarios in the current process.
+
+    Returns:
+        list of tuple: (scenario_id, tidy result) per scenario.
+    """
+    list_tidy = []
+    for scenario in scenarios:
+        indicator_adjusted = process_all(
+            scenario["dict_all_limits"],
+            indicator_name=scenario["indicator_name"],
+            country_code=scenario["country_code"],
+        )
+        list_tidy.append(
+            (
+                scenario["scenario_id"],
+                to_tidy(
+                    indicator_adjusted,
+                    scenario["scenario_id"],
+                    scenario["country_code"],
+                ),
+            )
+        )
+    return list_tidy
+
+
+def iter_chunks(scenarios, chunksize):
+    for start in range(0, len(scenarios), chunksize):
+        yield scenarios[start : start + chunksize]
+
+
+def run_sweep(scenarios, max_workers=None, chunksize=16, sink=None):
+    """Evaluates scenarios on a process pool and collects them in one tidy table.
+
+    Scenarios are sent to the workers in chunks of chunksize. Every worker loads each
+    dataset once (see DATA_REGISTRY) when it starts, not once per scenario. With
+    max_workers=1 everything runs in the current process.
+
+    With a sink (see src.utils.sinks), each finished scenario is streamed to disk
+    instead of being kept in memory, only a bounded number of chunks is in flight at
+    any time, and scenarios the sink already completed in a previous run are skipped.
+
+    Args:
+        scenarios (list of dict): scenarios as built by build_grid.
+        max_workers (int, optional): number of worker processes. Defaults to os.cpu_count().
+        chunksize (int): number of scenarios per task.
+        sink (ResultSink, optional): where to stream the results.
+
+    Returns:
+        pd.DataFrame: columns scenario_id, country_code, year, variable, value. None
+        when a sink is given.
+    """
+    scenarios = list(scenarios)
+    if sink is not None:
+        completed = sink.completed_scenarios()
+        scenarios = [s for s in scenarios if s["scenario_id"] not in completed]
+    max_workers = max_workers or os.cpu_count() or 1
+    list_tidy = []
+
+    def collect(chunk_tidy):
+        for scenario_id, tidy in chunk_tidy:
+            if sink is None:
+                list_tidy.append(tidy)
+            else:
+                sink.write(tidy, scenario_id)
+
+    if max_workers == 1:
+        for chunk in iter_chunks(scenarios, chunksize):
+            collect(run_scenarios(chunk))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=warm_datasets,
+            initargs=get_data_sources(scenarios),
+        ) as executor:
+            chunks = iter_chunks(scenarios, chunksize)
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(run_scenarios, chunk))
+                # Keep the workers busy without holding every result in memory
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+            for future in wait(pending).done:
+                collect(future.result())
+
+    if sink is not None:
+        sink.flush()
+        return None
+    if not list_tidy:
+        return pd.DataFrame(columns=TIDY_COLUMNS)
+    tidy = pd.concat(list_tidy, ignore_index=True)
+    return tidy.sort_values(["scenario_id", "year", "variable"], ignore_index=True)
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from .limit_process import get_aligned_limits, prefetch_data
+from .utils.alignment import AlignmentIndex
+from .utils.f_base import batched_linear_interpolation
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+
+
+def draw_coefs(coefs, nb_draws, coef_sigma, rng):
+    """Multiplicative log-normal noise on the coefs, renormalized to their original sum."""
+    coefs = np.asarray(coefs, dtype=float)
+    draws = coefs * rng.lognormal(0.0, coef_sigma, size=(nb_draws, len(coefs)))
+    return draws * (coefs.sum() / draws.sum(axis=1, keepdims=True))
+
+
+def draw_curves(curve, nb_draws, curve_sigma, rng):
+    """Normal noise on the breakpoints of a curve, kept sorted along x."""
+    x_points = curve.x_points + rng.normal(
+        0.0, curve_sigma, (nb_draws, len(curve.x_points))
+    )
+    f_points = curve.f_points + rng.normal(
+        0.0, curve_sigma, (nb_draws, len(curve.f_points))
+    )
+    order = np.argsort(x_points, axis=1)
+    return (
+        np.take_along_axis(x_points, order, axis=1),
+        np.take_along_axis(f_points, order, axis=1),
+    )
+
+
+def get_nb_columns_per_chunk(nb_draws, nb_years, nb_columns, nb_limits, memory_budget):
+    # The largest arrays of a chunk: one (draws x years x columns) array per limit
+    # factor, plus the running sum and a temporary
+    bytes_per_column = 8 * nb_draws * nb_years * (nb_limits + 2)
+    return int(max(1, min(nb_columns, memory_budget // bytes_per_column)))
+
+
+def monte_carlo_adjusted(
+    indicator,
+    dict_all_limits,
+    nb_draws=1000,
+    seed=0,
+    coef_sigma=0.05,
+    curve_sigma=0.02,
+    quantiles=DEFAULT_QUANTILES,
+    memory_budget=256 * 1024**2,
+    indicator_name=None,
+):
+    """Propagates the uncertainty of the limit curves and coefs to the adjusted indicator.
+
+    nb_draws perturbed coef vectors and curves (breakpoints moved by normal noise) are
+    drawn with a fixed seed, then all draws are evaluated at once as a
+    (draws x years x countries) array, processed by chunks of countries so that a chunk
+    stays within memory_budget. The draws do not depend on the chunking.
+
+    The curves of the limits without breakpoints (get_curve returns None) are not
+    perturbed: they are evaluated once with f_array and only their coef varies.
+
+    Args:
+        indicator (pd.Series or pd.DataFrame): one country, or year x country.
+        dict_all_limits (dict): same format as in process_limits.
+        nb_draws (int): number of draws.
+        seed (int): seed of the random generator.
+        coef_sigma (float): standard deviation of the log-normal noise on the coefs.
+        curve_sigma (float): standard deviation of the noise on the curve breakpoints.
+        quantiles (tuple of float): quantiles to report.
+        memory_budget (int): bytes allowed for the draw arrays of one chunk.
+        indicator_name (str, optional): name of the indicator. Defaults to indicator.name.
+
+    Returns:
+        pd.DataFrame: quantiles of the adjusted indicator, index year. Columns are the
+        quantiles for a Series, ('quantile', 'country_code') for a DataFrame.
+    """
+    if indicator_name is None:
+        indicator_name = indicator.name
+    multi_country = isinstance(indicator, pd.DataFrame)
+    rng = np.random.default_rng(seed)
+    prefetch_data(dict_all_limits)
+    alignment = AlignmentIndex.from_indicator(indicator)
+
+    indicator_values = indicator.to_numpy(dtype=float).reshape(len(indicator), -1)
+    list_limit_data = []
+    list_curve_draws = []
+    list_penalty_coefs = []
+    coefs = []
+    for limit_name, limit_implementor, limit_data, curve in get_aligned_limits(
+        indicator, dict_all_limits, alignment
+    ):
+        list_limit_data.append(limit_data)
+        if curve is None:
+            list_curve_draws.append(limit_implementor.f_array(limit_data))
+            list_penalty_coefs.append(None)
+        else:
+            list_curve_draws.append(draw_curves(curve, nb_draws, curve_sigma, rng))
+            list_penalty_coefs.append(curve.penalty_coef)
+        coefs.append(dict_all_limits[limit_name]["coef"])
+    coef_draws = draw_coefs(coefs, nb_draws, coef_sigma, rng)
+
+    nb_years, nb_columns = indicator_values.shape
+    chunk_size = get_nb_columns_per_chunk(
+        nb_draws, nb_years, nb_columns, len(coefs), memory_budget
+    )
+    result = np.empty((len(quantiles), nb_years, nb_columns))
+    for start in range(0, nb_columns, chunk_size):
+        columns = slice(start, min(start + chunk_size, nb_columns))
+        adjusted = np.zeros((nb_draws, nb_years, columns.stop - start))
+        for k, limit_data in enumerate(list_limit_data):
+            if isinstance(list_curve_draws[k], tuple):
+                x_points, f_points = list_curve_draws[k]
+                factor = batched_linear_interpolation(
+                    limit_data[:, columns], x_points, f_points, list_penalty_coefs[k]
+                )
+            else:
+                # Fixed curve, the same factor for every draw
+                factor = list_curve_draws[k][None, :, columns]
+            adjusted += coef_draws[:, k, None, None] * factor
+        adjusted *= indicator_values[None, :, columns]
+        result[:, :, columns] = np.quantile(adjusted, quantiles, axis=0)
+
+    if multi_country:
+        columns = pd.MultiIndex.from_product(
+            [list(quantiles), indicator.columns],
+            names=["quantile", indicator.columns.name],
+        )
+        return pd.DataFrame(
+            result.transpose(1, 0, 2).reshape(nb_years, -1),
+            index=indicator.index,
+            columns=columns,
+        )
+    return pd.DataFrame(
+        result[:, :, 0].T,
+        index=indicator.index,
+        columns=pd.Index(list(quantiles), name=indicator_name + "_adjusted"),
+    )
@@ -0,0 +1,126 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+MISSING_YEARS_POLICIES = ["skip", "ffill", "interpolate"]
+
+
+def forward_fill(values):
+    """Forward-fills NaN along the first axis (years), column by column."""
+    valid = ~np.isnan(values)
+    positions = np.where(valid, np.arange(len(values))[:, None], 0)
+    positions = np.maximum.accumulate(positions, axis=0)
+    filled = np.take_along_axis(values, positions, axis=0)
+    # Cells before the first valid value stay NaN
+    return np.where(np.maximum.accumulate(valid, axis=0), filled, np.nan)
+
+
+def interpolate(values, years):
+    """Linearly interpolates NaN along the first axis between valid years, no extrapolation."""
+    nb_years = len(values)
+    valid = ~np.isnan(values)
+    rows = np.arange(nb_years)[:, None]
+
+    previous = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    following = np.where(valid, rows, nb_years)
+    following = np.minimum.accumulate(following[::-1], axis=0)[::-1]
+    inside = (previous >= 0) & (following < nb_years)
+
+    previous_clipped = np.clip(previous, 0, nb_years - 1)
+    following_clipped = np.clip(following, 0, nb_years - 1)
+    y_previous = np.take_along_axis(values, previous_clipped, axis=0)
+    y_following = np.take_along_axis(values, following_clipped, axis=0)
+    x = years[:, None].astype(float)
+    x_previous = years[previous_clipped].astype(float)
+    x_following = years[following_clipped].astype(float)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(
+            x_following > x_previous, (x - x_previous) / (x_following - x_previous), 0.0
+        )
+    interpolated = y_previous + (y_following - y_previous) * weight
+    return np.where(valid, values, np.where(inside, interpolated, np.nan))
+
+
+class AlignmentIndex:
+    """Common year calendar (and countries) of a run, shared by all its limits.
+
+    Built once from the indicator. The positions of each dataset's years and country
+    codes in that calendar are computed the first time the dataset is gathered and
+    reused afterwards, so aligning a limit is a positional gather instead of a hash join.
+
+    Args:
+        years (array-like): years of the indicator.
+        country_codes (list of str, optional): countries of the indicator (multi-country runs).
+    """
+
+    def __init__(self, years, country_codes=None):
+        self.years = np.asarray(years, dtype=np.int64)
+        self.country_codes = None if country_codes is None else list(country_codes)
+        self.positions = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_indicator(cls, indicator):
+        if isinstance(indicator, pd.DataFrame):
+            return cls(indicator.index, indicator.columns)
+        return cls(indicator.index)
+
+    def get_positions(self, panel, country_codes):
+        # Panels derived with with_values share their index arrays: key on them
+        key = (id(panel.years), id(panel.country_codes), tuple(country_codes))
+        with self.lock:
+            entry = self.positions.get(key)
+            if entry is not None and entry[0] is panel.years:
+                return entry[2], entry[3]
+
+        year_positions = panel.year_positions(self.years)
+        country_positions = panel.country_positions(country_codes)
+        with self.lock:
+            # The index arrays are kept so that their ids cannot be reused
+            self.positions[key] = (
+                panel.years,
+                panel.country_codes,
+                year_positions,
+                country_positions,
+            )
+        return year_positions, country_positions
+
+    def gather(self, panel, country_codes=None, missing_years="skip"):
+        """Returns the panel values on the calendar of the run.
+
+        Args:
+            panel (Panel): dataset to align.
+            country_codes (list of str, optional): countries to gather. Defaults to the
+                countries of the run.
+            missing_years (str): what to do with the years the dataset does not cover or
+                leaves empty: "skip" (NaN), "ffill" (last known value) or "interpolate"
+                (linear between the known years, NaN outside).
+
+        Returns:
+            np.ndarray: shape (nb_years, nb_countries).
+        """
+        if missing_years not in MISSING_YEARS_POLICIES:
+            raise ValueError(
+                f"missing_years must be one of {MISSING_YEARS_POLICIES}, got {missing_years}"
+            )
+        if country_codes is None:
+            country_codes = self.country_codes
+
+        year_positions, country_positions = self.get_positions(panel, country_codes)
+        if panel.values.size == 0:
+            values = np.full((len(year_positions), len(country_positions)), np.nan)
+        else:
+            # Gather first and cast the block only, not the whole (float32) panel
+            values = panel.values[
+                np.ix_(np.maximum(year_positions, 0), np.maximum(country_positions, 0))
+            ].astype(float)
+        missing = (year_positions < 0)[:, None] | (country_positions < 0)[None, :]
+        values = np.where(missing, np.nan, values)
+
+        if missing_years == "ffill":
+            values = forward_fill(values)
+        elif missing_years == "interpolate":
+            values = interpolate(values, self.years)
+        return values
@@ -0,0 +1,203 @@
+"""Out-of-core datasets: long-format sources read chunk by chunk.
+
+A limit whose raw data does not fit in memory, such as regional or
+gridded monthly data, returns a ChunkedSource from data_creation instead of a
+DataFrame. The source is only read when its panel is needed, one chunk at a time, and
+aggregated on the fly to the year x country grain of the indicator: memory stays
+proportional to one chunk plus the year x country result.
+
+    ChunkedSource.from_csv("data/water_regional.csv", time_column="date",
+                           weight_column="population")
+
+Any re-iterable source of pandas chunks works, for instance an Arrow dataset:
+
+    ChunkedSource(lambda: (batch.to_pandas() for batch in dataset.to_batches()))
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from .ingestion import DEFAULT_DTYPE, load_cached
+from .panel import Panel
+from .registry import DATA_REGISTRY
+
+AGGREGATIONS = ("mean", "sum", "min", "max")
+
+
+class ChunkedSource:
+    """Lazily evaluated long-format dataset: one row per observation.
+
+    Args:
+        chunks (callable or iterator): function returning a new iterator of DataFrame
+            chunks at each call, or an iterator (then the source can be read only once).
+        path (str, optional): source file, used to cache the aggregated panel on disk
+            and in DATA_REGISTRY.
+        country_column (str): column of the country codes.
+        time_column (str): column of the years (int) or of the dates (anything
+            pd.to_datetime parses, e.g. monthly '2020-01').
+        value_column (str): column of the values.
+        weight_column (str, optional): column of the weights of a weighted mean.
+        aggregation (str): "mean", "sum", "min" or "max" of the values of a country
+            and year.
+    """
+
+    def __init__(
+        self,
+        chunks,
+        path=None,
+        country_column="country_code",
+        time_column="year",
+        value_column="value",
+        weight_column=None,
+        aggregation="mean",
+    ):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(
+                f"aggregation must be one of {AGGREGATIONS}, got {aggregation}"
+            )
+        self.chunks = chunks
+        self.path = path
+        self.country_column = country_column
+        self.time_column = time_column
+        self.value_column = value_column
+        self.weight_column = weight_column
+        self.aggregation = aggregation
+
+    @classmethod
+    def from_csv(cls, path, chunksize=1_000_000, **kwargs):
+        """Source reading the needed columns of a long CSV, chunksize rows at a time."""
+        source = cls(None, path=path, **kwargs)
+        columns = source.get_columns()
+
+        def chunks():
+            return pd.read_csv(
+                path,
+                usecols=columns,
+                chunksize=chunksize,
+                dtype={source.country_column: str, source.value_column: float},
+            )
+
+        source.chunks = chunks
+        return source
+
+    def get_columns(self):
+        columns = [self.country_column, self.time_column, self.value_column]
+        if self.weight_column is not None:
+            columns.append(self.weight_column)
+        return columns
+
+    def get_spec(self):
+        return {
+            "columns": self.get_columns(),
+            "weight_column": self.weight_column,
+            "aggregation": self.aggregation,
+        }
+
+    def get_cache_name(self):
+        # One cache per path and aggregation, so that two limits reading the same file
+        # differently do not share their panel
+        digest = hashlib.sha256(
+            json.dumps(self.get_spec(), sort_keys=True).encode()
+        ).hexdigest()
+        return f"{self.path}.{digest[:12]}"
+
+    def iter_chunks(self):
+        if callable(self.chunks):
+            return iter(self.chunks())
+        return iter(self.chunks)
+
+    def aggregate_chunk(self, chunk):
+        """Partial aggregates of one chunk, indexed by (year, country_code)."""
+        times = chunk[self.time_column]
+        if pd.api.types.is_integer_dtype(times):
+            years = times.to_numpy()
+        else:
+            years = pd.to_datetime(times).dt.year.to_numpy()
+        values = chunk[self.value_column].to_numpy(dtype=float)
+        if self.weight_column is None:
+            weights = np.ones(len(values))
+        else:
+            weights = chunk[self.weight_column].to_numpy(dtype=float)
+        known = ~np.isnan(values) & ~np.isnan(weights)
+
+        partial = pd.DataFrame(
+            {
+                "year": years[known],
+                "country_code": chunk[self.country_column].to_numpy()[known],
+            }
+        )
+        if self.aggregation in ("mean", "sum"):
+            partial["total"] = (values * weights)[known]
+            partial["weight"] = weights[known]
+        else:
+            partial[self.aggregation] = values[known]
+        return partial.groupby(["year", "country_code"], sort=False).agg(
+            self.get_combine_functions()
+        )
+
+    def get_combine_functions(self):
+        if self.aggregation in ("mean", "sum"):
+            return {"total": "sum", "weight": "sum"}
+        return {self.aggregation: self.aggregation}
+
+    def to_panel(self, dtype=DEFAULT_DTYPE):
+        """Streams the chunks and aggregates them to a year x country Panel."""
+        combine_functions = self.get_combine_functions()
+        aggregated = None
+        for chunk in self.iter_chunks():
+            partial = self.aggregate_chunk(chunk)
+            if aggregated is None:
+                aggregated = partial
+            else:
+                # The partial aggregates are at most years x countries rows: combining
+                # them after each chunk keeps the memory independent of the source size
+                aggregated = (
+                    pd.concat([aggregated, partial])
+                    .groupby(level=[0, 1], sort=False)
+                    .agg(combine_functions)
+                )
+        if aggregated is None:
+            return Panel(np.empty((0, 0), dtype=dtype), [], [])
+
+        if self.aggregation == "mean":
+            result = aggregated["total"] / aggregated["weight"]
+        elif self.aggregation == "sum":
+            result = aggregated["total"]
+        else:
+            result = aggregated[self.aggregation]
+        return Panel.from_frame(result.unstack("country_code"), dtype=dtype)
+
+
+def load_chunked_source(source, use_cache=True, dtype=DEFAULT_DTYPE):
+    """Aggregated panel of a ChunkedSource, cached next to its file like the CSVs."""
+    if source.path is None or not use_cache:
+        return source.to_panel(dtype=dtype)
+    return load_cached(
+        source.path,
+        lambda path, dtype: source.to_panel(dtype=dtype),
+        dtype=dtype,
+        cache_name=source.get_cache_name(),
+    )
+
+
+def panel_from_data(data):
+    """Panel of what data_creation returned.
+
+    Args:
+        data (pd.DataFrame, ChunkedSource or iterator of DataFrame chunks): year x
+            country frame, or long-format source aggregated in a streaming way.
+    """
+    if isinstance(data, pd.DataFrame):
+        return Panel.from_frame(data)
+    if not isinstance(data, ChunkedSource):
+        data = ChunkedSource(data)
+    if data.path is None:
+        return data.to_panel()
+    return DATA_REGISTRY.get_data(
+        data.get_cache_name(),
+        loader=lambda _: load_chunked_source(data),
+        source_path=data.path,
+    )
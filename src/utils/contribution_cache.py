@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+from .hashing import get_source_version, hash_config
+
+
+class ContributionCache:
+    """In-memory LRU cache of the adjusted sub-indicator of each limit.
+
+    An entry is addressed by the limit config, coef and parameters, the
+    version of its source data and the hash of the indicator it was applied to. When
+    only one limit of a configuration changes, process_limits recomputes that limit and
+    takes the others from the cache.
+
+    Args:
+        max_entries (int): number of contributions kept.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(dict_limit, limit_implementor, indicator_hash):
+        return hash_config(
+            dict_limit["config"],
+            dict_limit["coef"],
+            dict_limit.get("dict_parameters"),
+            get_source_version(limit_implementor.data_path),
+            indicator_hash,
+        )
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
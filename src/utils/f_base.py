@@ -1,3 +1,13 @@
+import functools
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_NB_SAMPLES = 4097
+MAX_NB_SAMPLES = 2**20 + 1
+
+
 def linear_interpolation(x, points):
     """
     Performs linear interpolation on a set of points.
@@ -73,3 +83,267 @@ def linear_interpolation_with_penalty(x, points, penalty_coef):
 
     # If x is not in the range, return None (this should not happen if inputs are correct)
     return None
+
+
+class PiecewiseLinearCurve:
+    """
+    Piecewise-linear curve built once from a list of points and evaluated on arrays.
+
+    The points are validated and sorted at construction so that every evaluation is a
+    binary search over the breakpoints. The edge rules are the ones of
+    linear_interpolation (penalty_coef=None) and linear_interpolation_with_penalty:
+    1 below the first x-value, 0 (or the penalty line) above the last one.
+
+    Args:
+    - points (list of tuples): A list of (x, f) pairs. The xs must be distinct.
+    - penalty_coef (float, optional): Slope of the line used above the last x-value.
+    """
+
+    def __init__(self, points, penalty_coef=None):
+        points = sorted((float(x), float(f)) for x, f in points)
+        if len(points) < 2:
+            raise ValueError("A curve needs at least two points")
+        x_points, f_points = zip(*points)
+        self.x_points = np.array(x_points)
+        self.f_points = np.array(f_points)
+        if np.any(np.diff(self.x_points) == 0):
+            raise ValueError("The x-values of the curve points must be distinct")
+        if not np.all(np.isfinite(self.x_points)):
+            raise ValueError("The x-values of the curve points must be finite")
+        self.penalty_coef = penalty_coef
+
+    def __call__(self, x):
+        """
+        Evaluates the curve.
+
+        Args:
+        - x (float, np.ndarray, pd.Series or pd.DataFrame): The x-values to evaluate.
+
+        Returns:
+        - Same type as x: f(x). NaN values stay NaN.
+        """
+        if isinstance(x, (pd.Series, pd.DataFrame)):
+            values = self.evaluate(x.to_numpy(dtype=float))
+            if isinstance(x, pd.DataFrame):
+                return pd.DataFrame(values, index=x.index, columns=x.columns)
+            return pd.Series(values, index=x.index, name=x.name)
+        if np.ndim(x) == 0:
+            return float(self.evaluate(np.asarray(x, dtype=float)))
+        return self.evaluate(np.asarray(x, dtype=float))
+
+    def evaluate(self, x):
+        """
+        Evaluates the curve on a float ndarray.
+        """
+        x_points, f_points = self.x_points, self.f_points
+        # Segment i is [x_points[i], x_points[i + 1]]: a value equal to a knot falls in the
+        # segment ending at that knot, as in the scalar loops
+        i = np.clip(np.searchsorted(x_points, x, side="left") - 1, 0, len(x_points) - 2)
+        xA, fA = x_points[i], f_points[i]
+        xB, fB = x_points[i + 1], f_points[i + 1]
+
+        with np.errstate(invalid="ignore"):
+            if self.penalty_coef is None:
+                result = fA + (fB - fA) * ((x - xA) / (xB - xA))
+                result = np.where(x > x_points[-1], 0.0, result)
+            else:
+                result = fA + (fB - fA) * (x - xA) / (xB - xA)
+                # Exact hits return the knot value, as linear_interpolation_with_penalty
+                result = np.where(x == xB, fB, result)
+                result = np.where(x == xA, fA, result)
+                c = f_points[-1] - (self.penalty_coef * x_points[-1])
+                result = np.where(x > x_points[-1], (self.penalty_coef * x) + c, result)
+            result = np.where(x < x_points[0], 1.0, result)
+        return result
+
+
+class TabulatedCurve(PiecewiseLinearCurve):
+    """
+    PiecewiseLinearCurve sampled once on a uniform grid between its first and last x-values.
+
+    Evaluating a point is then an index computation and one interpolation in a
+    contiguous table, whatever the number of breakpoints. Outside the grid the edge
+    rules of PiecewiseLinearCurve apply exactly.
+
+    Error bound: the table is exact at the grid points and on every cell without a
+    breakpoint. In a cell of width step containing breakpoints where the slope changes
+    by d_1, d_2..., the error is at most step * (|d_1| + |d_2| + ...) / 4. The largest of
+    these bounds is stored in error_bound.
+
+    Args:
+    - points (list of tuples): A list of (x, f) pairs. The xs must be distinct.
+    - penalty_coef (float, optional): Slope of the line used above the last x-value.
+    - nb_samples (int): Number of grid points.
+    - max_error (float, optional): Largest error allowed. The grid is doubled until the
+      error bound is below it, up to MAX_NB_SAMPLES points.
+    """
+
+    def __init__(
+        self, points, penalty_coef=None, nb_samples=DEFAULT_NB_SAMPLES, max_error=None
+    ):
+        super().__init__(points, penalty_coef=penalty_coef)
+        self.x_min = self.x_points[0]
+        self.x_max = self.x_points[-1]
+        slopes = np.diff(self.f_points) / np.diff(self.x_points)
+        self.slope_changes = np.abs(np.diff(slopes))
+        nb_samples = max(int(nb_samples), 2)
+        if max_error is not None:
+            # Double the grid until the bound is reached
+            while (
+                self.get_error_bound(nb_samples) > max_error
+                and nb_samples < MAX_NB_SAMPLES
+            ):
+                nb_samples = 2 * (nb_samples - 1) + 1
+            if self.get_error_bound(nb_samples) > max_error:
+                warnings.warn(
+                    f"The curve table is limited to {nb_samples} samples, "
+                    f"error bound {self.get_error_bound(nb_samples)} > {max_error}"
+                )
+        self.nb_samples = nb_samples
+        self.step = (self.x_max - self.x_min) / (nb_samples - 1)
+        self.error_bound = self.get_error_bound(nb_samples)
+        self.table = np.ascontiguousarray(
+            super().evaluate(np.linspace(self.x_min, self.x_max, nb_samples))
+        )
+
+    def get_error_bound(self, nb_samples):
+        if len(self.slope_changes) == 0:
+            return 0.0
+        step = (self.x_max - self.x_min) / (nb_samples - 1)
+        cells = np.clip(
+            ((self.x_points[1:-1] - self.x_min) // step).astype(np.intp),
+            0,
+            nb_samples - 2,
+        )
+        return float(np.bincount(cells, self.slope_changes).max() * step / 4)
+
+    def evaluate(self, x):
+        """
+        Evaluates the curve on a float ndarray with the table.
+        """
+        position = np.clip((x - self.x_min) / self.step, 0, self.nb_samples - 1)
+        position = np.nan_to_num(position)
+        i = np.minimum(position.astype(np.intp), self.nb_samples - 2)
+        fA = self.table[i]
+        result = fA + (self.table[i + 1] - fA) * (position - i)
+
+        if self.penalty_coef is None:
+            result = np.where(x > self.x_max, 0.0, result)
+        else:
+            c = self.f_points[-1] - (self.penalty_coef * self.x_max)
+            result = np.where(x > self.x_max, (self.penalty_coef * x) + c, result)
+        result = np.where(x < self.x_min, 1.0, result)
+        return np.where(np.isnan(x), np.nan, result)
+
+
+@functools.lru_cache(maxsize=128)
+def get_tabulated_curve(
+    points, penalty_coef=None, nb_samples=DEFAULT_NB_SAMPLES, max_error=None
+):
+    """
+    Returns the TabulatedCurve of a configuration, built once per process.
+
+    Args:
+    - points (tuple of tuples): The (x, f) pairs, as a hashable tuple.
+    - penalty_coef (float, optional): Slope of the line used above the last x-value.
+    - nb_samples (int): Number of grid points.
+    - max_error (float, optional): Largest error allowed, see TabulatedCurve.
+
+    Returns:
+    - TabulatedCurve: Shared between all the limits with the same configuration.
+    """
+    return TabulatedCurve(
+        points, penalty_coef=penalty_coef, nb_samples=nb_samples, max_error=max_error
+    )
+
+
+def linear_interpolation_array(x, points):
+    """
+    Array version of linear_interpolation.
+
+    Args:
+    - x (np.ndarray or pd.Series): The x-values to interpolate.
+    - points (list of tuples): A list of (x, f) pairs.
+
+    Returns:
+    - Same type as x: The interpolated values, 1 below the first x-value, 0 above the last.
+    """
+    return PiecewiseLinearCurve(points)(x)
+
+
+def linear_interpolation_with_penalty_array(x, points, penalty_coef):
+    """
+    Array version of linear_interpolation_with_penalty.
+
+    Args:
+    - x (np.ndarray or pd.Series): The x-values to interpolate.
+    - points (list of tuples): A list of (x, f) pairs.
+    - penalty_coef (float): The penalty coefficient to apply for x-values greater than the largest x.
+
+    Returns:
+    - Same type as x: The interpolated values, 1 below the first x-value, the penalized
+      value above the last.
+    """
+    return PiecewiseLinearCurve(points, penalty_coef=penalty_coef)(x)
+
+
+def batched_linear_interpolation(
+    x, x_points, f_points, penalty_coef=None, per_draw=False
+):
+    """
+    Evaluates many piecewise-linear curves at once, one curve per draw.
+
+    Same rules as PiecewiseLinearCurve: 1 below the first x-value, 0 (or the penalty
+    line) above the last one. The curves are looped over segment by segment, so the
+    cost is one vectorized pass per breakpoint over all draws and all points.
+
+    Args:
+    - x (np.ndarray): shape (...) shared by all draws, or shape (nb_draws, ...) with
+      the x-values of each draw if per_draw is True.
+    - x_points (np.ndarray): shape (nb_draws, nb_points), increasing along axis 1.
+    - f_points (np.ndarray): shape (nb_draws, nb_points).
+    - penalty_coef (float or np.ndarray, optional): penalty slope, scalar or shape (nb_draws,).
+    - per_draw (bool): whether the first dimension of x indexes the draws.
+
+    Returns:
+    - np.ndarray: shape (nb_draws, ...), f_d(x).
+    """
+    x_points = np.asarray(x_points, dtype=float)
+    f_points = np.asarray(f_points, dtype=float)
+    nb_draws, nb_points = x_points.shape
+    x = np.asarray(x, dtype=float)
+    if per_draw:
+        if x.ndim == 0 or x.shape[0] != nb_draws:
+            raise ValueError(
+                f"x has shape {x.shape}, expected ({nb_draws}, ...) with per_draw=True."
+            )
+    else:
+        x = np.broadcast_to(x[None, ...], (nb_draws,) + x.shape)
+    # Curve parameters broadcast against the trailing dimensions of x
+    shape = (nb_draws,) + (1,) * (x.ndim - 1)
+
+    def column(values, k):
+        return values[:, k].reshape(shape)
+
+    result = np.full(x.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Loop from the last segment down so that a knot gets the segment ending on it
+        for k in reversed(range(nb_points - 1)):
+            xA, fA = column(x_points, k), column(f_points, k)
+            xB, fB = column(x_points, k + 1), column(f_points, k + 1)
+            in_segment = (x >= xA) & (x <= xB)
+            result = np.where(
+                in_segment, fA + (fB - fA) * ((x - xA) / (xB - xA)), result
+            )
+
+        x_last, f_last = column(x_points, -1), column(f_points, -1)
+        if penalty_coef is None:
+            above = 0.0
+        else:
+            penalty_coef = np.broadcast_to(
+                np.asarray(penalty_coef, dtype=float), (nb_draws,)
+            ).reshape(shape)
+            above = (penalty_coef * x) + (f_last - penalty_coef * x_last)
+        result = np.where(x > x_last, above, result)
+        result = np.where(x < column(x_points, 0), 1.0, result)
+    return result
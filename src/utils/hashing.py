@@ -0,0 +1,44 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def normalize(obj):
+    """Turns a configuration into plain JSON types (tuples become lists, keys strings)."""
+    if isinstance(obj, dict):
+        return {str(key): normalize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [normalize(value) for value in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def hash_config(*objs):
+    """Stable hash of JSON-like configuration objects."""
+    text = json.dumps(normalize(objs), sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def hash_data(data):
+    """Hash of the content of a Series or DataFrame: values, index and labels."""
+    digest = hashlib.sha256()
+    digest.update(repr(type(data).__name__).encode())
+    digest.update(np.ascontiguousarray(data.to_numpy(dtype=float)).tobytes())
+    digest.update(pd.util.hash_pandas_object(data.index, index=False).to_numpy())
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr(data.columns.tolist()).encode())
+    else:
+        digest.update(repr(data.name).encode())
+    return digest.hexdigest()
+
+
+def get_source_version(path):
+    """Cheap version of a source file: absolute path, mtime and size."""
+    if path is None:
+        return None
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .panel import Panel
+
+CACHE_DIR_NAME = ".cache"
+CACHE_VERSION = 2
+DEFAULT_DTYPE = os.environ.get("GDP_PANEL_DTYPE", "float64")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    Computes the SHA-256 of a file without loading it in memory at once.
+
+    Args:
+    - path (str): Path of the file.
+    - chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+    - str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_world_bank_csv(path, dtype=DEFAULT_DTYPE):
+    """
+    Parses a World Bank wide CSV into a year x country panel.
+
+    Only the country code and year columns are read, directly as floats, and the wide
+    table is transposed: there is no long-format intermediate.
+
+    Args:
+    - path (str): Path of a World Bank CSV (4 metadata columns then one column per year).
+    - dtype (str): "float64" or "float32".
+
+    Returns:
+    - Panel: years x country codes, both sorted.
+    """
+    data = pd.read_csv(
+        path,
+        header=2,
+        usecols=lambda column: column == "Country Code" or column.isdigit(),
+        index_col="Country Code",
+    )
+
+    years = np.array([int(column) for column in data.columns])
+    country_codes = data.index.to_numpy(dtype=str)
+    values = data.to_numpy(dtype=dtype).T
+    year_order = np.argsort(years, kind="stable")
+    country_order = np.argsort(country_codes, kind="stable")
+
+    return Panel(
+        np.ascontiguousarray(values[np.ix_(year_order, country_order)]),
+        years[year_order],
+        country_codes[country_order],
+    )
+
+
+def get_cache_paths(path):
+    cache_dir = os.path.join(os.path.dirname(path), CACHE_DIR_NAME)
+    name = os.path.basename(path)
+    return (
+        os.path.join(cache_dir, name + ".npy"),
+        os.path.join(cache_dir, name + ".json"),
+    )
+
+
+def read_cache_metadata(metadata_path):
+    try:
+        with open(metadata_path) as file:
+            metadata = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if metadata.get("version") != CACHE_VERSION:
+        return None
+    return metadata
+
+
+def get_writer_id():
+    # Unique per thread across processes: the prefetch pool and the server workers of
+    # one process may write the same cache at the same time
+    return f"{os.getpid()}.{threading.get_ident()}"
+
+
+def write_cache(path, panel, stat, sha256):
+    values_path, metadata_path = get_cache_paths(path)
+    os.makedirs(os.path.dirname(values_path), exist_ok=True)
+
+    # Write to temporary files then rename so that a concurrent reader never sees a
+    # half-written cache
+    tmp_values_path = values_path + f".{get_writer_id()}.tmp.npy"
+    np.save(tmp_values_path, np.ascontiguousarray(panel.values))
+    os.replace(tmp_values_path, values_path)
+    write_cache_metadata(
+        metadata_path,
+        {
+            "version": CACHE_VERSION,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "source_size": stat.st_size,
+            "source_sha256": sha256,
+            "dtype": str(panel.values.dtype),
+            "years": panel.years.tolist(),
+            "country_codes": panel.country_codes.tolist(),
+        },
+    )
+
+
+def write_cache_metadata(metadata_path, metadata):
+    tmp_metadata_path = metadata_path + f".{get_writer_id()}.tmp"
+    with open(tmp_metadata_path, "w") as file:
+        json.dump(metadata, file)
+    os.replace(tmp_metadata_path, metadata_path)
+
+
+def read_cache(path, metadata):
+    values_path, _ = get_cache_paths(path)
+    values = np.load(values_path, mmap_mode="r")
+    return Panel(values, metadata["years"], metadata["country_codes"])
+
+
+def load_world_bank_csv(path, use_cache=True, dtype=DEFAULT_DTYPE):
+    """
+    Loads a World Bank wide CSV as a year x country panel, parsing it only once.
+
+    The parsed matrix is stored next to the source in a '.cache' directory as a '.npy'
+    file plus a JSON index. Later loads memory-map it as long as the source is unchanged:
+    the source mtime and size are checked first and its SHA-256 only when they differ.
+
+    Args:
+    - path (str): Path of a World Bank CSV.
+    - use_cache (bool): If False, always parse the CSV and leave the cache untouched.
+    - dtype (str): "float64" or "float32" (default from GDP_PANEL_DTYPE).
+
+    Returns:
+    - Panel: years x country codes. The values may be a read-only memory map.
+    """
+    return load_cached(
+        path, parse_world_bank_csv, use_cache=use_cache, dtype=dtype, cache_name=path
+    )
+
+
+def load_cached(path, parser, use_cache=True, dtype=DEFAULT_DTYPE, cache_name=None):
+    """
+    Loads a source file with parser(path, dtype=dtype), through the on-disk panel cache.
+
+    See load_world_bank_csv for the cache rules.
+
+    Args:
+    - path (str): Path of the source file.
+    - parser (callable): Function of the path and dtype returning a Panel.
+    - use_cache (bool): If False, always parse the file and leave the cache untouched.
+    - dtype (str): "float64" or "float32".
+    - cache_name (str, optional): Path the cache files are named after, to keep several
+      parsings of the same source. Defaults to path.
+
+    Returns:
+    - Panel: years x country codes. The values may be a read-only memory map.
+    """
+    if not use_cache:
+        return parser(path, dtype=dtype)
+    cache_name = cache_name or path
+
+    stat = os.stat(path)
+    values_path, metadata_path = get_cache_paths(cache_name)
+    metadata = read_cache_metadata(metadata_path)
+    sha256 = None
+
+    if metadata is not None and metadata["dtype"] != dtype:
+        metadata = None
+    if metadata is not None and os.path.exists(values_path):
+        if (
+            metadata["source_mtime_ns"] == stat.st_mtime_ns
+            and metadata["source_size"] == stat.st_size
+        ):
+            return read_cache(cache_name, metadata)
+
+        sha256 = file_sha256(path)
+        if metadata["source_sha256"] == sha256:
+            # Same content with a new mtime (copy, checkout...): refresh the metadata only
+            metadata["source_mtime_ns"] = stat.st_mtime_ns
+            metadata["source_size"] = stat.st_size
+            write_cache_metadata(metadata_path, metadata)
+            return read_cache(cache_name, metadata)
+
+    panel = parser(path, dtype=dtype)
+    try:
+        write_cache(cache_name, panel, stat, sha256 or file_sha256(path))
+    except OSError as e:
+        print(f"Could not write the cache of {path}: {e}")
+
+    return panel
+
+
+def get_metadata_paths(path):
+    """
+    Returns the cache metadata files of a source: the one named after the source, then
+    those of its other parsings (see the cache_name of load_cached, e.g. ChunkedSource).
+    """
+    metadata_path = get_cache_paths(path)[1]
+    cache_dir = os.path.dirname(metadata_path)
+    prefix = os.path.basename(path) + "."
+    try:
+        names = sorted(os.listdir(cache_dir))
+    except OSError:
+        names = []
+    other_paths = [
+        os.path.join(cache_dir, name)
+        for name in names
+        if name.startswith(prefix) and name.endswith(".json") and ".tmp" not in name
+    ]
+    return [metadata_path] + [
+        other_path for other_path in other_paths if other_path != metadata_path
+    ]
+
+
+def get_source_sha256(path):
+    """
+    Returns the SHA-256 of a source file, from the cache metadata when it is still fresh.
+
+    Any cache of the source works, including the ones stored under another cache_name.
+
+    Args:
+    - path (str): Path of a source file.
+
+    Returns:
+    - str: The hexadecimal digest.
+    """
+    stat = os.stat(path)
+    for metadata_path in get_metadata_paths(path):
+        metadata = read_cache_metadata(metadata_path)
+        if (
+            metadata is not None
+            and metadata["source_mtime_ns"] == stat.st_mtime_ns
+            and metadata["source_size"] == stat.st_size
+        ):
+            return metadata["source_sha256"]
+    return file_sha256(path)
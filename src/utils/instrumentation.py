@@ -0,0 +1,230 @@
+"""Opt-in instrumentation of the pipeline stages.
+
+Stages are recorded only when tracing is enabled, either with enable() or with
+environment variables read at import time:
+
+- GDP_TRACE=<path>: record every stage and write the trace to path at exit. A path
+  ending in '.trace.json' is written in Chrome trace format (chrome://tracing,
+  Perfetto), any other path as a JSON list of events.
+- GDP_TRACE_MEMORY=1: also record the memory allocated by each stage (tracemalloc).
+- GDP_PROFILE=<path>: run cProfile on the whole process and dump the stats to path.
+- GDP_TRACEMALLOC=<path>: dump a tracemalloc snapshot to path at exit.
+
+When tracing is disabled, stage() costs one attribute lookup.
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.events = []
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    def enable(self, memory=False):
+        self.enabled = True
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self.lock:
+            self.events = []
+
+    def record(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def get_events(self):
+        with self.lock:
+            return list(self.events)
+
+    def summary(self):
+        """Aggregates the events per stage: calls, total wall and CPU time, rows, memory."""
+        dict_summary = {}
+        for event in self.get_events():
+            stage_summary = dict_summary.setdefault(
+                event["name"],
+                {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0, "memory_bytes": 0},
+            )
+            stage_summary["calls"] += 1
+            for key in ["wall_s", "cpu_s", "rows", "memory_bytes"]:
+                stage_summary[key] += event[key] or 0
+        return dict_summary
+
+    def export_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.get_events(), file, indent=1)
+
+    def export_chrome_trace(self, path):
+        trace_events = [
+            {
+                "name": event["name"],
+                "ph": "X",
+                "ts": event["start_s"] * 1e6,
+                "dur": event["wall_s"] * 1e6,
+                "pid": event["pid"],
+                "tid": event["tid"],
+                "args": {
+                    key: event[key]
+                    for key in ["cpu_s", "rows", "memory_bytes", "metadata"]
+                    if event[key] is not None
+                },
+            }
+            for event in self.get_events()
+        ]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": trace_events}, file)
+
+    def export(self, path):
+        if path.endswith(".trace.json"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_json(path)
+
+
+TRACER = Tracer()
+
+
+class StageRecord:
+    """Mutable record of a running stage, used to set the number of rows inside it."""
+
+    __slots__ = ["rows", "metadata"]
+
+    def __init__(self, rows=None, metadata=None):
+        self.rows = rows
+        self.metadata = metadata
+
+
+@contextmanager
+def traced_stage(name, rows, metadata):
+    record = StageRecord(rows, metadata or None)
+    memory = TRACER.memory and tracemalloc.is_tracing()
+    if memory:
+        memory_start = tracemalloc.get_traced_memory()[0]
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        wall_end = time.perf_counter()
+        TRACER.record(
+            {
+                "name": name,
+                "start_s": wall_start - TRACER.origin,
+                "wall_s": wall_end - wall_start,
+                "cpu_s": time.process_time() - cpu_start,
+                "rows": record.rows,
+                "memory_bytes": (
+                    tracemalloc.get_traced_memory()[0] - memory_start
+                    if memory
+                    else None
+                ),
+                "metadata": record.metadata,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        )
+
+
+def stage(name, rows=None, **metadata):
+    """Context manager recording one pipeline stage when tracing is enabled.
+
+    Args:
+        name (str): name of the stage.
+        rows (int, optional): number of rows processed, can also be set on the
+            yielded record.
+        **metadata: extra JSON-serializable information stored with the event.
+    """
+    if not TRACER.enabled:
+        return nullcontext(StageRecord())
+    return traced_stage(name, rows, metadata)
+
+
+def get_nb_rows(result):
+    shape = getattr(result, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+def instrumented(name, **metadata):
+    """Decorator recording every call of a function as the stage name."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            with traced_stage(name, None, metadata) as record:
+                result = function(*args, **kwargs)
+                record.rows = get_nb_rows(result)
+            return result
+
+        wrapper.__instrumented__ = True
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(cls, dict_stages):
+    """Wraps the methods of cls defined in dict_stages {method_name: stage_name}."""
+    for method_name, stage_name in dict_stages.items():
+        method = cls.__dict__.get(method_name)
+        if method is None or getattr(method, "__isabstractmethod__", False):
+            continue
+        if getattr(method, "__instrumented__", False):
+            continue
+        setattr(
+            cls,
+            method_name,
+            instrumented(stage_name, implementor=cls.__name__)(method),
+        )
+
+
+def enable(memory=False):
+    TRACER.enable(memory=memory)
+
+
+def disable():
+    TRACER.disable()
+
+
+def setup_from_environment():
+    trace_path = os.environ.get("GDP_TRACE")
+    if trace_path:
+        enable(memory=os.environ.get("GDP_TRACE_MEMORY") == "1")
+        atexit.register(TRACER.export, trace_path)
+
+    profile_path = os.environ.get("GDP_PROFILE")
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def dump_profile():
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+
+        atexit.register(dump_profile)
+
+    tracemalloc_path = os.environ.get("GDP_TRACEMALLOC")
+    if tracemalloc_path:
+        tracemalloc.start(25)
+        atexit.register(lambda: tracemalloc.take_snapshot().dump(tracemalloc_path))
+
+
+setup_from_environment()
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+class Panel:
+    """Compact year x country time series: a dense 2D array and its two index arrays.
+
+    Panels are what the loaders and DATA_REGISTRY keep in memory. They convert to the
+    pandas year x country frame only at the API boundary (to_frame), and align with
+    integer positions instead of label joins.
+
+    Args:
+        values (np.ndarray): shape (nb_years, nb_countries), float32 or float64, NaN if missing.
+        years (np.ndarray): sorted int years.
+        country_codes (np.ndarray): sorted country codes (str).
+    """
+
+    __slots__ = ["values", "years", "country_codes", "country_positions_map", "indexes"]
+
+    def __init__(self, values, years, country_codes):
+        self.values = values
+        self.years = np.asarray(years, dtype=np.int32)
+        self.country_codes = np.asarray(country_codes, dtype=str)
+        self.country_positions_map = None
+        self.indexes = None
+
+    @classmethod
+    def from_frame(cls, data, dtype=np.float64):
+        data = data.sort_index().sort_index(axis=1)
+        return cls(data.to_numpy(dtype=dtype), data.index, data.columns)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.years.nbytes + self.country_codes.nbytes
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def with_values(self, values):
+        """New panel with the same indexes, for element-wise transformations."""
+        panel = Panel.__new__(Panel)
+        panel.values = values
+        panel.years = self.years
+        panel.country_codes = self.country_codes
+        panel.country_positions_map = self.country_positions_map
+        panel.indexes = self.get_indexes()
+        return panel
+
+    def year_positions(self, years):
+        """Positions of years in this panel, -1 for the years it does not cover."""
+        years = np.asarray(years)
+        if len(self.years) == 0:
+            return np.full(years.shape, -1)
+        positions = np.searchsorted(self.years, years)
+        positions = np.minimum(positions, len(self.years) - 1)
+        return np.where(self.years[positions] == years, positions, -1)
+
+    def country_positions(self, country_codes):
+        """Positions of country codes in this panel, -1 for the unknown ones."""
+        if self.country_positions_map is None:
+            self.country_positions_map = {
+                country_code: position
+                for position, country_code in enumerate(self.country_codes.tolist())
+            }
+        return np.array(
+            [self.country_positions_map.get(code, -1) for code in country_codes],
+            dtype=np.intp,
+        )
+
+    def get_indexes(self):
+        # The pandas indexes are built once and shared by the panels derived with with_values
+        if self.indexes is None:
+            self.indexes = (
+                pd.Index(self.years.astype(np.int64), name="year"),
+                pd.Index(self.country_codes.tolist(), name="country_code"),
+            )
+        return self.indexes
+
+    def to_frame(self):
+        index, columns = self.get_indexes()
+        return pd.DataFrame(self.values, index=index, columns=columns, copy=False)
+
+    def to_series(self, country_code):
+        position = self.country_positions([country_code])[0]
+        if position < 0:
+            raise KeyError(country_code)
+        return pd.Series(
+            self.values[:, position], index=self.get_indexes()[0], name=country_code
+        )
@@ -1,5 +1,11 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+from .instrumentation import instrumented
 
 DEFAULT_PLOTTING_CARACTERISTICS = {
     "font": {
@@ -11,13 +17,58 @@ DEFAULT_PLOTTING_CARACTERISTICS = {
     "figure_size": (15, 10),
 }
 
+# Figure reused by the headless renders of the current process
+HEADLESS_FIGURE = None
+
 
+def get_axes(plotting_caracteristics, output_path=None, axs=None):
+    """Returns the axes to draw on.
+
+    Interactive mode (no output_path, no axs) uses pyplot. In headless mode the figure
+    is created without pyplot, so no GUI backend is needed, and it is reused from one
+    render to the next.
+    """
+    global HEADLESS_FIGURE
+
+    if axs is not None:
+        axs.clear()
+        return axs
+    if output_path is None:
+        fig, axs = plt.subplots(figsize=plotting_caracteristics["figure_size"])
+        return axs
+    if HEADLESS_FIGURE is None:
+        HEADLESS_FIGURE = Figure()
+        HEADLESS_FIGURE.add_subplot()
+    HEADLESS_FIGURE.set_size_inches(plotting_caracteristics["figure_size"])
+    axs = HEADLESS_FIGURE.axes[0]
+    axs.clear()
+    return axs
+
+
+def show_or_save(axs, output_path=None):
+    """Shows the figure (blocking) or writes it to output_path (PNG, SVG... from the extension)."""
+    if output_path is None:
+        plt.show()
+        return None
+    axs.figure.savefig(output_path)
+    return output_path
+
+
+def select_years(indicator_adjusted, from_year=None, to_year=None):
+    if from_year or to_year:
+        return indicator_adjusted.loc[from_year or None : to_year or None]
+    return indicator_adjusted
+
+
+@instrumented("plotting", function="plot_linear_interpolation")
 def plot_linear_interpolation(
     points,
     inf,
     sup,
     title="Linear Interpolation",
     plotting_caracteristics=DEFAULT_PLOTTING_CARACTERISTICS,
+    output_path=None,
+    axs=None,
 ):
     """
     Plots the linear interpolation between a series of points.
@@ -25,6 +76,11 @@ def plot_linear_interpolation(
     Args:
     - points (list of tuples): A list of (x, f) points where the xs are in sorted order.
     - title (str): The title of the plot.
+    - output_path (str, optional): If given, the figure is written to this file instead of shown.
+    - axs (matplotlib.axes.Axes, optional): Axes to draw on, cleared first.
+
+    Returns:
+    - str: output_path, or None when the figure is shown.
     """
     x_points, y_points = zip(*points)
     # Ensure the range is within the bounds of the data
@@ -33,7 +89,7 @@ def plot_linear_interpolation(
     y_values = np.interp(x_values, x_points, y_points)
 
     # Now plot the points and the piecewise linear interpolation between them
-    fig, axs = plt.subplots(figsize=plotting_caracteristics["figure_size"])
+    axs = get_axes(plotting_caracteristics, output_path=output_path, axs=axs)
 
     axs.plot(x_points, y_points, "o", label="Data points")
     axs.plot(x_values, y_values, "-", label="Linear interpolation")
@@ -44,9 +100,10 @@ def plot_linear_interpolation(
     axs.legend()
     axs.grid(True)
 
-    plt.show()
+    return show_or_save(axs, output_path)
 
 
+@instrumented("plotting", function="plot_linear_interpolation_with_penalty")
 def plot_linear_interpolation_with_penalty(
     points,
     penalty_coef,
@@ -54,6 +111,8 @@ def plot_linear_interpolation_with_penalty(
     sup,
     title="Linear Interpolation with Penalty",
     plotting_caracteristics=DEFAULT_PLOTTING_CARACTERISTICS,
+    output_path=None,
+    axs=None,
 ):
     """
     Plots the linear interpolation with penalty coefficient for x-values greater than the largest x in points.
@@ -62,6 +121,11 @@ def plot_linear_interpolation_with_penalty(
     - points (list of tuples): A list of (x, f) points where the xs are in sorted order.
     - penalty_coef (float): The penalty coefficient to apply for x-values greater than the largest x.
     - title (str): The title of the plot.
+    - output_path (str, optional): If given, the figure is written to this file instead of shown.
+    - axs (matplotlib.axes.Axes, optional): Axes to draw on, cleared first.
+
+    Returns:
+    - str: output_path, or None when the figure is shown.
     """
     x_points, y_points = zip(*points)
     x_range = [min(inf, min(x_points)), min(sup, x_points[-1])]
@@ -77,7 +141,7 @@ def plot_linear_interpolation_with_penalty(
         y_values = np.concatenate((y_values, y_penalty))
 
     # Plot the points and the piecewise linear interpolation
-    fig, axs = plt.subplots(figsize=plotting_caracteristics["figure_size"])
+    axs = get_axes(plotting_caracteristics, output_path=output_path, axs=axs)
 
     axs.plot(x_points, y_points, "o", label="Data points")
     axs.plot(x_values, y_values, "-", label="Interpolation with penalty")
@@ -89,9 +153,10 @@ def plot_linear_interpolation_with_penalty(
     axs.legend()
     axs.grid(True)
 
-    plt.show()
+    return show_or_save(axs, output_path)
 
 
+@instrumented("plotting", function="plot_indicator_with_all_limits")
 def plot_indicator_with_all_limits(
     indicator_adjusted,
     indicator_name,
@@ -99,62 +164,29 @@ def plot_indicator_with_all_limits(
     from_year=None,
     to_year=None,
     plotting_caracteristics=DEFAULT_PLOTTING_CARACTERISTICS,
+    output_path=None,
+    axs=None,
 ):
     nb_limits = len(dict_limits_config)
-    indicator_adjusted_to_plot = indicator_adjusted.copy()
-    if from_year:
-        if to_year:
-            indicator_adjusted_to_plot = indicator_adjusted_to_plot.loc[
-                from_year:to_year
-            ].copy()
-        else:
-            indicator_adjusted_to_plot = indicator_adjusted_to_plot.loc[
-                from_year:
-            ].copy()
-    elif to_year:
-        indicator_adjusted_to_plot = indicator_adjusted_to_plot.loc[:to_year].copy()
-
-    count = 0
-    for limit in list(dict_limits_config.keys()):
-        if count == 0:
-            indicator_adjusted_to_plot["sub_" + indicator_name + "_" + str(count)] = (
-                indicator_adjusted_to_plot["sub_" + indicator_name + "_" + limit]
-            )
-            indicator_adjusted_to_plot[
-                "sub_" + indicator_name + "_adjusted_" + str(count)
-            ] = indicator_adjusted_to_plot[
-                "sub_" + indicator_name + "_adjusted_" + limit
-            ]
-        else:
-            indicator_adjusted_to_plot["sub_" + indicator_name + "_" + str(count)] = (
-                indicator_adjusted_to_plot["sub_" + indicator_name + "_" + limit]
-                + indicator_adjusted_to_plot[
-                    "sub_" + indicator_name + "_" + str(count - 1)
-                ]
-            )
-            indicator_adjusted_to_plot[
-                "sub_" + indicator_name + "_adjusted_" + str(count)
-            ] = (
-                indicator_adjusted_to_plot[
-                    "sub_" + indicator_name + "_adjusted_" + limit
-                ]
-                + indicator_adjusted_to_plot[
-                    "sub_" + indicator_name + "_adjusted_" + str(count - 1)
-                ]
-            )
-
-        count += 1
-
-    fig, axs = plt.subplots(figsize=plotting_caracteristics["figure_size"])
+    indicator_adjusted_to_plot = select_years(indicator_adjusted, from_year, to_year)
+
+    # Stacked sub-indicators: column k is the sum of the first k + 1 limits
+    list_limits = list(dict_limits_config.keys())
+    stacked = indicator_adjusted_to_plot[
+        ["sub_" + indicator_name + "_" + limit for limit in list_limits]
+    ].cumsum(axis=1, skipna=False)
+    stacked_adjusted = indicator_adjusted_to_plot[
+        ["sub_" + indicator_name + "_adjusted_" + limit for limit in list_limits]
+    ].cumsum(axis=1, skipna=False)
+
+    axs = get_axes(plotting_caracteristics, output_path=output_path, axs=axs)
     list_colors = ["red", "blue", "green", "brown", "yellow", "purple", "pink"]
     list_labels = list(dict_limits_config.keys())
 
     x = indicator_adjusted_to_plot.index
     for k in range(nb_limits):
-        y_1 = indicator_adjusted_to_plot["sub_" + indicator_name + "_" + str(k)]
-        y_2 = indicator_adjusted_to_plot[
-            "sub_" + indicator_name + "_adjusted_" + str(k)
-        ]
+        y_1 = stacked.iloc[:, k]
+        y_2 = stacked_adjusted.iloc[:, k]
         color = list_colors[k]
         label = list_labels[k]
         axs.plot(x, y_1, color=color, linestyle="dashed", label=label)
@@ -176,11 +208,12 @@ def plot_indicator_with_all_limits(
     axs.set_ylabel(
         "Indicateur en USD courant", fontdict=plotting_caracteristics["font"]
     )
-    plt.legend()
+    axs.legend()
 
-    plt.show()
+    return show_or_save(axs, output_path)
 
 
+@instrumented("plotting", function="plot_indicator_with_one_limit")
 def plot_indicator_with_one_limit(
     indicator_adjusted,
     indicator_name,
@@ -189,21 +222,12 @@ def plot_indicator_with_one_limit(
     from_year=None,
     to_year=None,
     plotting_caracteristics=DEFAULT_PLOTTING_CARACTERISTICS,
+    output_path=None,
+    axs=None,
 ):
-    indicator_adjusted_to_plot = indicator_adjusted.copy()
-    if from_year:
-        if to_year:
-            indicator_adjusted_to_plot = indicator_adjusted_to_plot.loc[
-                from_year:to_year
-            ].copy()
-        else:
-            indicator_adjusted_to_plot = indicator_adjusted_to_plot.loc[
-                from_year:
-            ].copy()
-    elif to_year:
-        indicator_adjusted_to_plot = indicator_adjusted_to_plot.loc[:to_year].copy()
-
-    fig, axs = plt.subplots(figsize=plotting_caracteristics["figure_size"])
+    indicator_adjusted_to_plot = select_years(indicator_adjusted, from_year, to_year)
+
+    axs = get_axes(plotting_caracteristics, output_path=output_path, axs=axs)
 
     x = indicator_adjusted_to_plot.index
 
@@ -248,6 +272,38 @@ def plot_indicator_with_one_limit(
     axs.set_ylabel(
         "Indicateur en USD courant", fontdict=plotting_caracteristics["font"]
     )
-    plt.legend()
+    axs.legend()
+
+    return show_or_save(axs, output_path)
+
+
+def render_job(job):
+    """Renders one plot_indicator_with_all_limits job (dict of its arguments) to a file."""
+    return plot_indicator_with_all_limits(**job)
 
-    plt.show()
+
+def render_batch(list_jobs, output_dir, image_format="png", max_workers=None):
+    """Renders many scenarios headlessly on a process pool.
+
+    Args:
+        list_jobs (list of dict): arguments of plot_indicator_with_all_limits, plus an
+            optional "name" used as file name (defaults to the position in the list).
+        output_dir (str): directory of the images.
+        image_format (str): "png", "svg"...
+        max_workers (int, optional): number of processes. 1 renders in this process.
+
+    Returns:
+        list of str: paths of the images, in the order of list_jobs.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    list_kwargs = []
+    for k, job in enumerate(list_jobs):
+        kwargs = dict(job)
+        name = kwargs.pop("name", str(k))
+        kwargs["output_path"] = os.path.join(output_dir, f"{name}.{image_format}")
+        list_kwargs.append(kwargs)
+
+    if max_workers == 1:
+        return [render_job(kwargs) for kwargs in list_kwargs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(render_job, list_kwargs))
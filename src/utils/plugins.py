@@ -0,0 +1,199 @@
+"""Discovery of the limit and indicator implementors, and of the projection models.
+
+An implementor is registered under a config name either
+
+- with a decorator, for the modules of the built-in packages (src.limits, src.indicators)
+  and for src.projection:
+
+    @register_limit("water_general_wb")
+    class WaterGeneralWBLimit(LimitImplementor):
+        ...
+
+- or with a package entry point, for implementors shipped in another distribution:
+
+    [project.entry-points."gdp_under_constraint.limits"]
+    co2_budget = "my_limits.co2:CO2BudgetLimit"
+
+The index {config name: "module:Class"} is built once, the first time a name is
+resolved, and cached on disk (GDP_CACHE_DIR, default ~/.cache/gdp_under_constraint)
+together with a fingerprint of the built-in package files and of the installed
+distributions. Later processes read the index instead of importing every module, and a
+class is imported only when its name is resolved.
+"""
+
+import importlib
+import importlib.metadata
+import json
+import os
+import pkgutil
+import sys
+import threading
+
+from .registry import DATA_REGISTRY
+
+CACHE_DIR = os.environ.get(
+    "GDP_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "gdp_under_constraint"),
+)
+
+
+def get_directory_fingerprint(directory):
+    fingerprint = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".py"):
+                    fingerprint.append([entry.name, entry.stat().st_mtime_ns])
+    except OSError:
+        pass
+    return sorted(fingerprint)
+
+
+def get_sys_path_fingerprint(project_directory):
+    # Installing or removing a distribution changes the mtime of its site directory. The
+    # working directory and the project itself change all the time and are left out.
+    fingerprint = []
+    for path in sys.path:
+        if not path or os.path.abspath(path) in [os.getcwd(), project_directory]:
+            continue
+        try:
+            fingerprint.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            continue
+    return fingerprint
+
+
+class PluginRegistry:
+    """Registry of the implementors of one kind (limits or indicators).
+
+    Args:
+        kind (str): "limits" or "indicators", used for the cache file name.
+        package (str): built-in package whose modules register implementors with
+            register(), or built-in module doing so itself.
+        entry_point_group (str): entry point group of external implementors.
+    """
+
+    def __init__(self, kind, package, entry_point_group):
+        self.kind = kind
+        self.package = package
+        self.entry_point_group = entry_point_group
+        self.index = None
+        self.classes = {}
+        self.lock = threading.RLock()
+
+    def register(self, name):
+        """Class decorator registering an implementor under name."""
+
+        def decorator(cls):
+            with self.lock:
+                self.classes[name] = cls
+                if self.index is not None:
+                    self.index[name] = f"{cls.__module__}:{cls.__qualname__}"
+            return cls
+
+        return decorator
+
+    def get_cache_path(self):
+        return os.path.join(CACHE_DIR, f"plugins_{self.kind}.json")
+
+    def get_fingerprint(self):
+        package_directory = os.path.dirname(
+            importlib.import_module(self.package).__file__
+        )
+        project_directory = os.path.dirname(
+            os.path.dirname(os.path.abspath(package_directory))
+        )
+        return {
+            "package": get_directory_fingerprint(package_directory),
+            "sys_path": get_sys_path_fingerprint(project_directory),
+        }
+
+    def scan(self):
+        """Imports the built-in modules and lists the entry points: the slow path."""
+        index = {}
+        package = importlib.import_module(self.package)
+        # A plain module (no __path__) registers its implementors when imported
+        for module_info in pkgutil.iter_modules(getattr(package, "__path__", [])):
+            importlib.import_module(f"{self.package}.{module_info.name}")
+        for entry_point in importlib.metadata.entry_points(
+            group=self.entry_point_group
+        ):
+            index[entry_point.name] = entry_point.value
+        # Decorated classes win over entry points with the same name
+        for name, cls in self.classes.items():
+            index[name] = f"{cls.__module__}:{cls.__qualname__}"
+        return index
+
+    def load_index(self):
+        fingerprint = self.get_fingerprint()
+        try:
+            with open(self.get_cache_path()) as file:
+                cache = json.load(file)
+            if cache["fingerprint"] == fingerprint:
+                return cache["index"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = self.scan()
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = self.get_cache_path() + f".{os.getpid()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump({"fingerprint": fingerprint, "index": index}, file)
+            os.replace(tmp_path, self.get_cache_path())
+        except OSError:
+            pass
+        return index
+
+    def get_index(self):
+        with self.lock:
+            if self.index is None:
+                self.index = self.load_index()
+                for name, cls in self.classes.items():
+                    self.index[name] = f"{cls.__module__}:{cls.__qualname__}"
+            return self.index
+
+    def names(self):
+        return sorted(self.get_index().keys())
+
+    def get(self, name):
+        """Returns the class registered under name, importing its module if needed."""
+        cls = self.classes.get(name)
+        if cls is not None:
+            return cls
+        target = self.get_index()[name]
+        module_path, class_name = target.split(":")
+        cls = DATA_REGISTRY.get_class(module_path, class_name, package=None)
+        with self.lock:
+            self.classes.setdefault(name, cls)
+        return cls
+
+    def invalidate(self):
+        """Forgets the index and deletes its disk cache, for example after adding a module."""
+        with self.lock:
+            self.index = None
+        try:
+            os.remove(self.get_cache_path())
+        except OSError:
+            pass
+
+
+LIMIT_PLUGINS = PluginRegistry("limits", "src.limits", "gdp_under_constraint.limits")
+INDICATOR_PLUGINS = PluginRegistry(
+    "indicators", "src.indicators", "gdp_under_constraint.indicators"
+)
+PROJECTION_PLUGINS = PluginRegistry(
+    "projections", "src.projection", "gdp_under_constraint.projections"
+)
+
+
+def register_limit(name):
+    return LIMIT_PLUGINS.register(name)
+
+
+def register_indicator(name):
+    return INDICATOR_PLUGINS.register(name)
+
+
+def register_projection_model(name):
+    return PROJECTION_PLUGINS.register(name)
@@ -0,0 +1,146 @@
+import importlib
+import os
+import threading
+from collections import OrderedDict
+
+from .ingestion import load_world_bank_csv
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def get_nbytes(data):
+    try:
+        return int(data.memory_usage(index=True, deep=False).sum())
+    except AttributeError:
+        return int(getattr(data, "nbytes", 0))
+
+
+def scale_panel(panel, scale):
+    return panel.with_values(panel.values / scale)
+
+
+class DataRegistry:
+    """Process-wide cache of the implementor classes and of the loaded datasets.
+
+    Classes are resolved once per (module, class) pair. Datasets are cached per
+    data_path (made absolute) with LRU eviction as soon as either the number of
+    entries or their total size exceeds its budget. A dataset cached under another key
+    than its source file (e.g. a ChunkedSource under its cache name) records that
+    source, so that contains and invalidate work with the source path as well. Cached
+    datasets are shared: callers must not modify them in place.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.classes = {}
+        self.datasets = OrderedDict()
+        self.sources = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def get_class(self, module_path, class_name, package="src"):
+        key = (package, module_path, class_name)
+        cls = self.classes.get(key)
+        if cls is None:
+            module = importlib.import_module(module_path, package=package)
+            cls = getattr(module, class_name)
+            self.classes[key] = cls
+        return cls
+
+    def get_data(self, data_path, loader=load_world_bank_csv, source_path=None):
+        """Returns the dataset of data_path, loading it with loader on a miss.
+
+        Args:
+            data_path (str): path of the source file, or key of the dataset.
+            loader (callable, optional): function of the path returning the dataset.
+            source_path (str, optional): source file of the dataset when data_path is
+                not a file path.
+
+        Returns:
+            The cached dataset.
+        """
+        key = os.path.abspath(data_path)
+        with self.lock:
+            if key in self.datasets:
+                self.datasets.move_to_end(key)
+                self.hits += 1
+                return self.datasets[key][0]
+            self.misses += 1
+
+        data = loader(data_path)
+        nbytes = get_nbytes(data)
+
+        with self.lock:
+            if key in self.datasets:
+                # Loaded concurrently by another thread: keep the first one
+                return self.datasets[key][0]
+            self.datasets[key] = (data, nbytes)
+            self.nbytes += nbytes
+            if source_path is not None:
+                self.sources[key] = os.path.abspath(source_path)
+            self.evict()
+        return data
+
+    def get_scaled_data(self, data_path, scale, loader=load_world_bank_csv):
+        """Returns the panel of data_path divided by scale, computed once.
+
+        The scaled panel is cached under its own key with data_path as its source, so
+        implementors that rescale their data do not allocate a new matrix per call.
+        """
+        return self.get_data(
+            f"{data_path}:scale={scale}",
+            loader=lambda _: scale_panel(loader(data_path), scale),
+            source_path=data_path,
+        )
+
+    def contains(self, data_path):
+        """Whether the dataset of data_path, or one read from that file, is cached."""
+        key = os.path.abspath(data_path)
+        with self.lock:
+            return key in self.datasets or key in self.sources.values()
+
+    def evict(self):
+        with self.lock:
+            # The most recent entry is always kept, even if it is alone over budget
+            while len(self.datasets) > 1 and (
+                len(self.datasets) > self.max_entries or self.nbytes > self.max_bytes
+            ):
+                key, (_, nbytes) = self.datasets.popitem(last=False)
+                self.sources.pop(key, None)
+                self.nbytes -= nbytes
+
+    def invalidate(self, data_path=None):
+        """Drops the datasets of data_path, or every dataset if data_path is None."""
+        with self.lock:
+            if data_path is None:
+                self.datasets.clear()
+                self.sources.clear()
+                self.nbytes = 0
+                return
+            key = os.path.abspath(data_path)
+            keys = [key] + [k for k, source in self.sources.items() if source == key]
+            for key in keys:
+                self.sources.pop(key, None)
+                entry = self.datasets.pop(key, None)
+                if entry is not None:
+                    self.nbytes -= entry[1]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.datasets),
+                "nbytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "classes": len(self.classes),
+            }
+
+
+DATA_REGISTRY = DataRegistry(
+    max_entries=int(os.environ.get("GDP_REGISTRY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    max_bytes=int(os.environ.get("GDP_REGISTRY_MAX_BYTES", DEFAULT_MAX_BYTES)),
+)
@@ -0,0 +1,156 @@
+import contextlib
+import functools
+import os
+import pickle
+import sqlite3
+import time
+
+from .hashing import hash_config
+from .ingestion import get_source_sha256
+from .plugins import CACHE_DIR
+
+DEFAULT_MAX_BYTES = 512 * 1024**2
+
+
+@functools.lru_cache(maxsize=1)
+def get_code_version():
+    """Fingerprint of the package sources: editing the code invalidates every result."""
+    package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fingerprint = []
+    for root, _, files in os.walk(package_directory):
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                fingerprint.append(
+                    [
+                        os.path.relpath(path, package_directory),
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                    ]
+                )
+    return hash_config(sorted(fingerprint))
+
+
+class ResultCache:
+    """On-disk cache of process_all results in a SQLite file, with LRU eviction by size.
+
+    Results are stored pickled under a key hashing the indicator name, the country code,
+    the normalized dict_all_limits, the SHA-256 of every source file involved and the
+    version of the code. When the total size exceeds max_bytes, the least recently read
+    results are deleted.
+
+    Args:
+        path (str, optional): SQLite file. Defaults to GDP_CACHE_DIR/results.sqlite.
+        max_bytes (int): size budget of the stored results.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(CACHE_DIR, "results.sqlite")
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB,"
+                " nbytes INTEGER, created REAL, last_access REAL, hits INTEGER)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)"
+            )
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Connection committed on success, rolled back on error, and always closed."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def get_key(indicator_name, country_code, dict_all_limits, source_paths):
+        source_hashes = {
+            os.path.abspath(path): get_source_sha256(path)
+            for path in sorted(set(source_paths))
+        }
+        return hash_config(
+            indicator_name,
+            country_code,
+            dict_all_limits,
+            source_hashes,
+            get_code_version(),
+        )
+
+    def get(self, key):
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                connection.execute(
+                    "UPDATE counters SET value = value + 1 WHERE name = 'misses'"
+                )
+                return None
+            connection.execute(
+                "UPDATE results SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+            connection.execute(
+                "UPDATE counters SET value = value + 1 WHERE name = 'hits'"
+            )
+        return pickle.loads(row[0])
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, 0)",
+                (key, blob, len(blob), now, now),
+            )
+            self.evict(connection)
+
+    def evict(self, connection):
+        total = connection.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM results"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = connection.execute(
+            "SELECT key, nbytes FROM results ORDER BY last_access"
+        ).fetchall()
+        # The most recent result is kept even if it is alone over budget
+        for key, nbytes in rows[:-1]:
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= nbytes
+
+    def clear(self):
+        with self.connect() as connection:
+            connection.execute("DELETE FROM results")
+            connection.execute("UPDATE counters SET value = 0")
+        with self.connect() as connection:
+            connection.execute("VACUUM")
+
+    def stats(self):
+        with self.connect() as connection:
+            entries, nbytes = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM results"
+            ).fetchone()
+            counters = dict(connection.execute("SELECT name, value FROM counters"))
+        requests = counters["hits"] + counters["misses"]
+        return {
+            "path": self.path,
+            "entries": entries,
+            "nbytes": nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_ratio": counters["hits"] / requests if requests else None,
+        }
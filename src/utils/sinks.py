@@ -0,0 +1,136 @@
+import json
+import os
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+
+class ResultSink(ABC):
+    """Appends tidy scenario results to a file with bounded buffering.
+
+    Results are kept in memory until buffer_rows rows are pending, then appended to the
+    file. After every flush the ids of the flushed scenarios and the file size are
+    appended to a '.done' log next to the file. Reopening the same path resumes: the
+    file is truncated back to the last logged size (dropping rows of a flush that did
+    not finish) and completed_scenarios() tells which scenarios can be skipped.
+
+    Args:
+        path (str): output file.
+        buffer_rows (int): number of pending rows that triggers a flush.
+        resume (bool): if False, existing output at path is overwritten.
+    """
+
+    def __init__(self, path, buffer_rows=100_000, resume=True):
+        self.path = path
+        self.done_path = path + ".done"
+        self.buffer_rows = buffer_rows
+        self.buffer = []
+        self.buffer_scenarios = []
+        self.nb_buffered_rows = 0
+        self.completed = set()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if resume:
+            self.recover()
+        else:
+            for file_path in [self.path, self.done_path]:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+    def recover(self):
+        size = 0
+        if os.path.exists(self.done_path):
+            with open(self.done_path) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line of a crashed run
+                        break
+                    self.completed.update(entry["scenario_ids"])
+                    size = entry["size"]
+        if os.path.exists(self.path):
+            with open(self.path, "r+b") as file:
+                file.truncate(size)
+
+    def completed_scenarios(self):
+        return set(self.completed)
+
+    def write(self, tidy, scenario_id):
+        """Adds the tidy result of one finished scenario."""
+        self.buffer.append(tidy)
+        self.buffer_scenarios.append(scenario_id)
+        self.nb_buffered_rows += len(tidy)
+        if self.nb_buffered_rows >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer_scenarios:
+            return
+        data = pd.concat(self.buffer, ignore_index=True)
+        with open(self.path, "a", newline="") as file:
+            self.append(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+            size = file.tell()
+        with open(self.done_path, "a") as file:
+            file.write(
+                json.dumps(
+                    {
+                        "scenario_ids": [int(i) for i in self.buffer_scenarios],
+                        "size": size,
+                    }
+                )
+                + "\n"
+            )
+
+        self.completed.update(self.buffer_scenarios)
+        self.buffer = []
+        self.buffer_scenarios = []
+        self.nb_buffered_rows = 0
+
+    @abstractmethod
+    def append(self, data, file):
+        """Writes the rows of data at the end of the open file."""
+        pass
+
+    @abstractmethod
+    def read(self):
+        """Returns the whole file as a DataFrame."""
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CSVResultSink(ResultSink):
+    def append(self, data, file):
+        data.to_csv(file, header=file.tell() == 0, index=False)
+
+    def read(self):
+        return pd.read_csv(self.path)
+
+
+class JSONLResultSink(ResultSink):
+    def append(self, data, file):
+        text = data.to_json(orient="records", lines=True)
+        if text and not text.endswith("\n"):
+            text += "\n"
+        file.write(text)
+
+    def read(self):
+        return pd.read_json(self.path, orient="records", lines=True)
+
+
+def get_sink(path, buffer_rows=100_000, resume=True):
+    """Returns the sink matching the extension of path (.jsonl, otherwise CSV)."""
+    if path.endswith(".jsonl"):
+        return JSONLResultSink(path, buffer_rows=buffer_rows, resume=resume)
+    return CSVResultSink(path, buffer_rows=buffer_rows, resume=resume)
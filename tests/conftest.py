@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+# Keep the plugin index and the result cache out of the user cache directory
+os.environ.setdefault("GDP_CACHE_DIR", tempfile.mkdtemp(prefix="gdp_tests_"))
+
+import pytest
+
+from benchmarks.fixtures import create_fixtures
+from src.utils.registry import DATA_REGISTRY
+
+
+@pytest.fixture
+def fixture_data(tmp_path, monkeypatch):
+    """Synthetic GDP and water CSVs in a temporary working directory."""
+    country_codes = create_fixtures(str(tmp_path), nb_countries=6)
+    monkeypatch.chdir(tmp_path)
+    DATA_REGISTRY.invalidate()
+    yield country_codes
+    DATA_REGISTRY.invalidate()
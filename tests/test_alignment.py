@@ -0,0 +1,77 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.alignment import AlignmentIndex, forward_fill, interpolate
+from src.utils.panel import Panel
+
+
+def get_panel(nb_years, nb_countries, dtype):
+    values = np.arange(nb_years * nb_countries, dtype=dtype).reshape(nb_years, -1)
+    country_codes = [f"C{k:04d}" for k in range(nb_countries)]
+    return Panel(values, np.arange(2000, 2000 + nb_years), country_codes)
+
+
+def test_gather_casts_only_the_gathered_block():
+    panel = get_panel(1000, 2000, np.float32)
+    alignment = AlignmentIndex([2001, 2003, 3500], ["C0001", "C1999", "XXX"])
+    alignment.gather(panel)
+
+    tracemalloc.start()
+    try:
+        values = alignment.gather(panel)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # The float64 copy of the whole panel would be 16 MB
+    assert peak < 1024**2
+    assert values.dtype == np.float64
+    np.testing.assert_array_equal(
+        values,
+        [[2001.0, 3999.0, np.nan], [6001.0, 7999.0, np.nan], [np.nan] * 3],
+    )
+
+
+def test_gather_empty_panel():
+    panel = Panel(np.empty((0, 0)), [], [])
+    values = AlignmentIndex([2000, 2001], ["FRA"]).gather(panel)
+    assert values.shape == (2, 1)
+    assert np.isnan(values).all()
+
+
+def get_gappy_frame():
+    # Irregular years, leading/trailing gaps, a column with no value at all
+    years = np.array([2000, 2001, 2003, 2004, 2008, 2010, 2011])
+    values = np.array(
+        [
+            [np.nan, 1.0, np.nan, np.nan],
+            [2.0, np.nan, np.nan, np.nan],
+            [np.nan, np.nan, 5.0, np.nan],
+            [np.nan, 4.0, np.nan, np.nan],
+            [6.0, np.nan, np.nan, np.nan],
+            [np.nan, np.nan, 7.0, np.nan],
+            [9.0, np.nan, np.nan, np.nan],
+        ]
+    )
+    return pd.DataFrame(values, index=years)
+
+
+def test_forward_fill_matches_pandas():
+    frame = get_gappy_frame()
+    np.testing.assert_array_equal(forward_fill(frame.to_numpy()), frame.ffill().to_numpy())
+
+
+def test_interpolate_matches_pandas():
+    frame = get_gappy_frame()
+    expected = frame.interpolate(method="index", limit_area="inside")
+    np.testing.assert_allclose(
+        interpolate(frame.to_numpy(), frame.index.to_numpy()), expected.to_numpy()
+    )
+
+
+def test_gather_unknown_missing_years_policy():
+    panel = get_panel(3, 2, np.float64)
+    with pytest.raises(ValueError, match="missing_years"):
+        AlignmentIndex(panel.years, panel.country_codes).gather(panel, missing_years="bfill")
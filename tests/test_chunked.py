@@ -0,0 +1,100 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import WATER_PATH
+from src.limit_process import prefetch_data
+from src.limits.limit_implementor import LimitImplementor
+from src.utils import ingestion
+from src.utils.chunked import ChunkedSource, panel_from_data
+from src.utils.ingestion import (
+    file_sha256,
+    get_source_sha256,
+    load_world_bank_csv,
+)
+from src.utils.plugins import LIMIT_PLUGINS
+from src.utils.registry import DATA_REGISTRY
+
+
+def write_long_csv(path):
+    pd.DataFrame(
+        {
+            "country_code": ["FRA", "FRA", "DEU", "DEU"],
+            "date": ["2020-01", "2020-02", "2020-01", "2021-01"],
+            "value": [1.0, 3.0, 5.0, 7.0],
+        }
+    ).to_csv(path, index=False)
+
+
+def test_source_sha256_from_chunked_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / "regional.csv")
+    write_long_csv(path)
+    panel = panel_from_data(ChunkedSource.from_csv(path, time_column="date"))
+    values_2020 = panel.values[panel.year_positions([2020])[0]]
+    np.testing.assert_allclose(values_2020, [5.0, 2.0])
+
+    sha256 = file_sha256(path)
+
+    def rehash(path):
+        raise AssertionError("the source was hashed again")
+
+    monkeypatch.setattr(ingestion, "file_sha256", rehash)
+    assert get_source_sha256(path) == sha256
+
+
+class RegionalLimit(LimitImplementor):
+    def __init__(self, config_name, limit_name, dict_parameters=None):
+        super().__init__(config_name, limit_name, dict_parameters=dict_parameters)
+        self.data_path = "regional.csv"
+
+    def data_creation(self):
+        return ChunkedSource.from_csv(self.data_path, time_column="date")
+
+    def f(self, point, dict_parameters=None):
+        return 1.0
+
+    def calculate(self, indicator):
+        return indicator
+
+
+def test_prefetch_chunked_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_long_csv("regional.csv")
+    monkeypatch.setitem(LIMIT_PLUGINS.classes, "regional_test", RegionalLimit)
+    dict_all_limits = {"regional": {"coef": 1, "config": "regional_test"}}
+    DATA_REGISTRY.invalidate()
+    try:
+        prefetch_data(dict_all_limits)
+        assert DATA_REGISTRY.contains("regional.csv")
+        misses = DATA_REGISTRY.stats()["misses"]
+        RegionalLimit("regional_test", "regional").panel_creation()
+        assert DATA_REGISTRY.stats()["misses"] == misses
+    finally:
+        DATA_REGISTRY.invalidate("regional.csv")
+    assert not DATA_REGISTRY.contains("regional.csv")
+
+
+def test_concurrent_cold_loads(fixture_data):
+    # Threads of one process parsing the same source write their own temporary files
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        barrier = threading.Barrier(2)
+
+        def get_writer_id(_):
+            barrier.wait()
+            return ingestion.get_writer_id()
+
+        assert len(set(executor.map(get_writer_id, range(2)))) == 2
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        panels = list(
+            executor.map(lambda _: load_world_bank_csv(WATER_PATH), range(16))
+        )
+    for panel in panels:
+        np.testing.assert_array_equal(panel.values, panels[0].values)
+    cache_dir = os.path.join(os.path.dirname(WATER_PATH), ingestion.CACHE_DIR_NAME)
+    assert not [name for name in os.listdir(cache_dir) if ".tmp" in name]
+    np.testing.assert_array_equal(
+        load_world_bank_csv(WATER_PATH).values, panels[0].values
+    )
@@ -0,0 +1,22 @@
+import json
+
+import pandas as pd
+
+import main
+
+
+def compute(tmp_path, *arguments):
+    output_path = tmp_path / "result.csv"
+    main.run(["compute", "--no-cache", "--output", str(output_path), *arguments])
+    return pd.read_csv(output_path, index_col="year")
+
+
+def test_country_overrides_config_country(fixture_data, tmp_path):
+    config_path = tmp_path / "config.json"
+    dict_all_limits = main.get_default_limits("DEU")
+    config_path.write_text(json.dumps(dict_all_limits))
+
+    result = compute(tmp_path, "--country", "FRA", "--config", str(config_path))
+    expected = compute(tmp_path, "--country", "FRA")
+    pd.testing.assert_frame_equal(result, expected)
+    assert not result.equals(compute(tmp_path, "--country", "DEU"))
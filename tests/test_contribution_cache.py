@@ -0,0 +1,62 @@
+import copy
+import os
+
+import pandas as pd
+
+from src.indicator_process import IndicatorImplementorFactory
+from src.limit_process import LimitImplementorFactory, process_limits
+from src.utils.contribution_cache import ContributionCache
+from src.utils.hashing import hash_data
+
+DICT_ALL_LIMITS = {
+    "water": {
+        "coef": 0.5,
+        "config": "water_general_wb",
+        "dict_parameters": {"country_code": "FRA"},
+    },
+    "water2": {
+        "coef": 0.5,
+        "config": "water_general_wb",
+        "dict_parameters": {"country_code": "FRA", "list_points": [(0.2, 1), (0.6, 0)]},
+    },
+}
+
+
+def get_gdp():
+    return IndicatorImplementorFactory.get_implementor("gdp").data_creation()["FRA"]
+
+
+def test_only_the_changed_limit_is_recomputed(fixture_data):
+    gdp = get_gdp()
+    cache = ContributionCache()
+    process_limits(gdp, DICT_ALL_LIMITS, indicator_name="gdp", cache=cache)
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["misses"] == 2
+
+    # Only the coef of water changes: water2 comes from the cache
+    dict_all_limits = copy.deepcopy(DICT_ALL_LIMITS)
+    dict_all_limits["water"]["coef"] = 0.3
+    result = process_limits(gdp, dict_all_limits, indicator_name="gdp", cache=cache)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+    pd.testing.assert_frame_equal(
+        result, process_limits(gdp, dict_all_limits, indicator_name="gdp")
+    )
+
+
+def test_key_changes_with_points_and_source(fixture_data):
+    gdp_hash = hash_data(get_gdp())
+    dict_limit = DICT_ALL_LIMITS["water"]
+    limit = LimitImplementorFactory.get_implementor(
+        dict_limit["config"], "water", dict_limit["dict_parameters"]
+    )
+    key = ContributionCache.get_key(dict_limit, limit, gdp_hash)
+    assert ContributionCache.get_key(dict_limit, limit, gdp_hash) == key
+
+    dict_other_points = copy.deepcopy(dict_limit)
+    dict_other_points["dict_parameters"]["list_points"] = [(0.5, 1), (0.9, 0)]
+    assert ContributionCache.get_key(dict_other_points, limit, gdp_hash) != key
+
+    stat = os.stat(limit.data_path)
+    os.utime(limit.data_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert ContributionCache.get_key(dict_limit, limit, gdp_hash) != key
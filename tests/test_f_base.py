@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from src.utils.f_base import (
+    PiecewiseLinearCurve,
+    TabulatedCurve,
+    batched_linear_interpolation,
+    get_tabulated_curve,
+    linear_interpolation,
+    linear_interpolation_with_penalty,
+)
+
+POINTS = [(0.0, 1.0), (2.0, 0.5), (4.0, 0.0)]
+
+
+def get_draws(nb_draws):
+    x_points = np.tile([point[0] for point in POINTS], (nb_draws, 1))
+    f_points = np.tile([point[1] for point in POINTS], (nb_draws, 1))
+    return x_points, f_points
+
+
+def test_shared_x_with_as_many_rows_as_draws():
+    # 3 years x 2 countries evaluated by 3 draws: every draw sees the whole of x
+    x = np.array([[0.0, 1.0], [1.5, 2.0], [3.0, 5.0]])
+    x_points, f_points = get_draws(3)
+    result = batched_linear_interpolation(x, x_points, f_points)
+    assert result.shape == (3, 3, 2)
+    expected = PiecewiseLinearCurve(POINTS)(x)
+    for draw in result:
+        np.testing.assert_allclose(draw, expected)
+
+
+def test_shared_1d_x_with_as_many_points_as_draws():
+    x = np.array([1.0, 3.0])
+    x_points, f_points = get_draws(2)
+    result = batched_linear_interpolation(x, x_points, f_points)
+    np.testing.assert_allclose(result, [[0.75, 0.25], [0.75, 0.25]])
+
+
+def test_per_draw_x():
+    x = np.array([[1.0, 3.0], [2.0, 4.0]])
+    x_points, f_points = get_draws(2)
+    result = batched_linear_interpolation(x, x_points, f_points, per_draw=True)
+    np.testing.assert_allclose(result, [[0.75, 0.25], [0.5, 0.0]])
+
+
+def test_per_draw_x_with_wrong_number_of_draws():
+    x_points, f_points = get_draws(2)
+    with pytest.raises(ValueError):
+        batched_linear_interpolation(np.zeros(3), x_points, f_points, per_draw=True)
+
+
+KINKED_POINTS = [(0.0, 1.0), (0.1, 0.2), (0.15, 0.9), (0.2, 0.1), (1.0, 0.0)]
+
+
+@pytest.mark.parametrize("nb_samples", [2, 3, 5, 17, 4097])
+@pytest.mark.parametrize("penalty_coef", [None, -2.0])
+def test_tabulated_curve_error_bound(nb_samples, penalty_coef):
+    # With 2 or 3 samples the three kinks of KINKED_POINTS share a cell
+    curve = TabulatedCurve(KINKED_POINTS, penalty_coef, nb_samples=nb_samples)
+    exact = PiecewiseLinearCurve(KINKED_POINTS, penalty_coef)
+    x = np.concatenate([np.linspace(-0.5, 1.5, 20001), curve.x_points])
+    error = np.abs(curve(x) - exact(x))
+    assert error.max() <= curve.error_bound + 1e-12
+    # The edges are exact, including the penalty line above the last point
+    outside = (x < 0.0) | (x > 1.0)
+    np.testing.assert_allclose(curve(x[outside]), exact(x[outside]), rtol=0, atol=1e-12)
+
+
+def test_tabulated_curve_max_error():
+    curve = get_tabulated_curve(tuple(KINKED_POINTS), nb_samples=5, max_error=1e-3)
+    assert curve.error_bound <= 1e-3
+    assert curve.nb_samples > 5
+    with pytest.warns(UserWarning, match="limited to"):
+        TabulatedCurve(KINKED_POINTS, nb_samples=5, max_error=1e-12)
+
+
+PARITY_POINTS = [(0.5, 1.0), (1.0, 0.8), (2.0, 0.3), (3.0, 0.0)]
+PARITY_X = [-1.0, 0.0, 0.5, 0.75, 1.0, 1.5, 2.0, 2.9, 3.0, 3.5, 10.0]
+
+
+@pytest.mark.parametrize("penalty_coef", [None, -0.25])
+@pytest.mark.parametrize(
+    "points", [PARITY_POINTS, PARITY_POINTS[::-1], PARITY_POINTS[2:] + PARITY_POINTS[:2]]
+)
+def test_curve_matches_scalar_interpolation(points, penalty_coef):
+    # The scalar references expect sorted points, the curve sorts them itself
+    if penalty_coef is None:
+        expected = [linear_interpolation(x, PARITY_POINTS) for x in PARITY_X]
+    else:
+        expected = [
+            linear_interpolation_with_penalty(x, PARITY_POINTS, penalty_coef)
+            for x in PARITY_X
+        ]
+    curve = PiecewiseLinearCurve(points, penalty_coef)
+    np.testing.assert_allclose(curve(np.array(PARITY_X)), expected, rtol=0, atol=1e-12)
+    for x, value in zip(PARITY_X, expected):
+        assert curve(x) == pytest.approx(value, abs=1e-12)
+
+    values = curve(np.array([np.nan, 1.0, np.nan]))
+    assert np.isnan(values[[0, 2]]).all()
+    assert values[1] == pytest.approx(0.8)
@@ -0,0 +1,18 @@
+import pytest
+
+from benchmarks.import_time import (
+    CASES,
+    DEFAULT_BUDGET_MS,
+    get_loaded_modules,
+    time_statement,
+)
+
+REPEAT = 5
+
+
+@pytest.mark.parametrize("statement, forbidden_modules, budget", CASES)
+def test_import_budget(statement, forbidden_modules, budget):
+    assert get_loaded_modules(statement, forbidden_modules) == []
+    reference = time_statement("pass", REPEAT)
+    elapsed_ms = (time_statement(statement, REPEAT) - reference) * 1000
+    assert elapsed_ms <= (budget or DEFAULT_BUDGET_MS)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from src.indicator_process import IndicatorImplementorFactory
+from src.inverse import InverseProblem
+
+DICT_ALL_LIMITS = {
+    "water": {
+        "coef": 1,
+        "config": "water_general_wb",
+        "dict_parameters": {"country_code": "FRA"},
+    }
+}
+
+
+def test_evaluate_as_many_candidates_as_points(fixture_data):
+    gdp = IndicatorImplementorFactory.get_implementor("gdp").data_creation()["FRA"]
+    problem = InverseProblem(
+        gdp, DICT_ALL_LIMITS, gdp * 0.5, search_coefs=False, curve_limits=["water"]
+    )
+    # Every candidate must be scored on all the points, whatever the batch size
+    candidates = np.tile(problem.get_initial_parameters(), (problem.nb_points, 1))
+    candidates[1:, 0] -= np.linspace(0.0, 0.1, problem.nb_points - 1)
+    losses = problem.evaluate(candidates)
+    assert losses.shape == (problem.nb_points,)
+    expected = [problem.evaluate(candidate)[0] for candidate in candidates]
+    np.testing.assert_allclose(losses, expected)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from src.indicator_process import IndicatorImplementorFactory
+from src.limit_process import process_limits
+
+DICT_ALL_LIMITS = {
+    "water": {
+        "coef": 0.5,
+        "config": "water_general_wb",
+        "dict_parameters": {"country_code": "FRA"},
+    },
+    "water2": {
+        "coef": 0.5,
+        "config": "water_general_wb",
+        "dict_parameters": {
+            "country_code": "FRA",
+            "list_points": [(0.2, 1), (0.6, 0)],
+        },
+    },
+}
+
+
+def test_gdp_adjusted_sums_the_adjusted_sub_indicators(fixture_data):
+    gdp = IndicatorImplementorFactory.get_implementor("gdp").data_creation()["FRA"]
+    result = process_limits(gdp, DICT_ALL_LIMITS, indicator_name="gdp")
+
+    # gdp_adjusted is the sum of the coef-weighted adjusted sub-indicators, not of
+    # the unadjusted ones (which would always give back gdp)
+    expected = pd.DataFrame(
+        {
+            "gdp": [1910.885062, 49.582907, 2439.810718, 2738.266732],
+            "sub_gdp_adjusted_water": [797.442803, 0.0, 1219.905359, 1300.232573],
+            "sub_gdp_adjusted_water2": [0.0, 0.0, 593.542245, 170.031359],
+            "gdp_adjusted": [797.442803, 0.0, 1813.447604, 1470.263933],
+        },
+        index=pd.Index([1960, 1963, 1964, 1965], name="year"),
+    )
+    pd.testing.assert_frame_equal(
+        result.loc[expected.index, expected.columns],
+        expected,
+        check_index_type=False,
+        check_names=False,
+        rtol=1e-6,
+    )
+    # Undefined as soon as one limit has no data
+    assert np.isnan(result.loc[1961, "gdp_adjusted"])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.indicator_process import IndicatorImplementorFactory
+from src.limit_process import LimitImplementorFactory, get_aligned_limits
+from src.utils.alignment import AlignmentIndex
+from src.utils.ingestion import load_world_bank_csv
+from src.utils.registry import DATA_REGISTRY
+
+
+@pytest.mark.parametrize("dict_parameters", [None, {"list_points": [(0.5, 1), (1, 0)]}])
+def test_country_code_missing_for_one_country(fixture_data, dict_parameters):
+    gdp = IndicatorImplementorFactory.get_implementor("gdp").data_creation()["FRA"]
+    limit = LimitImplementorFactory.get_implementor(
+        "water_general_wb", "water", dict_parameters
+    )
+    with pytest.raises(KeyError, match="Country code not specified"):
+        limit.calculate_aligned(gdp, AlignmentIndex.from_indicator(gdp))
+
+
+def test_calculate_all_countries(fixture_data):
+    gdp = IndicatorImplementorFactory.get_implementor("gdp").data_creation()
+    limit = LimitImplementorFactory.get_implementor("water_general_wb", "water")
+    adjusted = limit.calculate(gdp)
+    assert adjusted.shape == gdp.shape
+    values, gdp_values = adjusted.to_numpy(), gdp.to_numpy()
+    mask = ~np.isnan(values)
+    assert mask.any()
+    assert (values[mask] <= gdp_values[mask]).all()
+
+
+def test_panel_creation_scales_once(fixture_data):
+    limit = LimitImplementorFactory.get_implementor("water_general_wb", "water")
+    panel = limit.panel_creation()
+    assert limit.panel_creation() is panel
+    assert DATA_REGISTRY.contains(limit.data_path)
+    raw = load_world_bank_csv(limit.data_path)
+    np.testing.assert_allclose(panel.values, raw.values / 100)
+
+    gdp = IndicatorImplementorFactory.get_implementor("gdp")
+    assert gdp.panel_creation() is gdp.panel_creation()
+
+    DATA_REGISTRY.invalidate(limit.data_path)
+    assert not DATA_REGISTRY.contains(limit.data_path)
+
+
+def test_tabulated_max_error_reaches_the_curve():
+    limit = LimitImplementorFactory.get_implementor(
+        "water_general_wb",
+        "water",
+        {"tabulated": 3, "tabulated_max_error": 1e-4},
+    )
+    curve = limit.get_curve()
+    assert curve.error_bound <= 1e-4
+    assert curve.nb_samples > 3
+
+
+def test_get_aligned_limits(fixture_data):
+    gdp = IndicatorImplementorFactory.get_implementor("gdp").data_creation()
+    dict_all_limits = {
+        "water": {"coef": 0.5, "config": "water_general_wb"},
+        "water_ffill": {
+            "coef": 0.5,
+            "config": "water_general_wb",
+            "dict_parameters": {"missing_years": "ffill"},
+        },
+    }
+    alignment = AlignmentIndex.from_indicator(gdp)
+    aligned_limits = get_aligned_limits(gdp, dict_all_limits, alignment)
+    assert [limit[0] for limit in aligned_limits] == ["water", "water_ffill"]
+    for limit_name, limit_implementor, limit_data, curve in aligned_limits:
+        assert limit_implementor.limit_name == limit_name
+        assert limit_data.shape == gdp.shape
+        assert curve is limit_implementor.get_curve()
+
+    fra = gdp["FRA"]
+    dict_limit = {
+        "coef": 1,
+        "config": "water_general_wb",
+        "dict_parameters": {"country_code": "FRA"},
+    }
+    [(_, _, limit_data, _)] = get_aligned_limits(
+        fra, {"water": dict_limit}, AlignmentIndex.from_indicator(fra)
+    )
+    assert limit_data.shape == (len(fra), 1)
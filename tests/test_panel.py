@@ -0,0 +1,16 @@
+import numpy as np
+
+from src.utils.chunked import ChunkedSource
+from src.utils.panel import Panel
+
+
+def test_year_positions():
+    panel = Panel(np.zeros((3, 1)), [2000, 2001, 2003], ["FRA"])
+    np.testing.assert_array_equal(
+        panel.year_positions([1999, 2001, 2002, 2003, 2004]), [-1, 1, -1, 2, -1]
+    )
+
+
+def test_year_positions_of_an_empty_source():
+    panel = ChunkedSource(lambda: iter([])).to_panel()
+    np.testing.assert_array_equal(panel.year_positions([2000, 2001]), [-1, -1])
@@ -0,0 +1,69 @@
+import importlib.metadata
+import json
+from collections import OrderedDict
+
+import pytest
+
+from src.utils import plugins
+from src.utils.plugins import PluginRegistry
+
+GROUP = "gdp_under_constraint.tests"
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(plugins, "CACHE_DIR", str(tmp_path))
+    entry_points = [
+        importlib.metadata.EntryPoint("ordered", "collections:OrderedDict", GROUP),
+        importlib.metadata.EntryPoint("shadowed", "collections:Counter", GROUP),
+    ]
+    monkeypatch.setattr(
+        importlib.metadata,
+        "entry_points",
+        lambda group=None: [ep for ep in entry_points if ep.group == group],
+    )
+    registry = PluginRegistry("tests", "src.limits", GROUP)
+    registry.scans = 0
+    scan = registry.scan
+
+    def counted_scan():
+        registry.scans += 1
+        return scan()
+
+    monkeypatch.setattr(registry, "scan", counted_scan)
+    return registry
+
+
+def test_entry_points_and_decorators(registry):
+    @registry.register("shadowed")
+    class Shadowed:
+        pass
+
+    assert registry.names() == ["ordered", "shadowed"]
+    assert registry.get("ordered") is OrderedDict
+    assert registry.get("shadowed") is Shadowed
+    with open(registry.get_cache_path()) as file:
+        assert json.load(file)["index"]["shadowed"].endswith(".Shadowed")
+
+
+def test_disk_index_reused_until_fingerprint_changes(registry, monkeypatch):
+    registry.get_index()
+    assert registry.scans == 1
+
+    # A new process: the index is read from the disk cache
+    registry.index = None
+    assert registry.get("ordered") is OrderedDict
+    assert registry.scans == 1
+
+    fingerprint = registry.get_fingerprint()
+    fingerprint["sys_path"].append(["new-site-packages", 0])
+    monkeypatch.setattr(registry, "get_fingerprint", lambda: fingerprint)
+    registry.index = None
+    registry.get_index()
+    assert registry.scans == 2
+    with open(registry.get_cache_path()) as file:
+        assert json.load(file)["fingerprint"] == fingerprint
+
+    registry.invalidate()
+    registry.get_index()
+    assert registry.scans == 3
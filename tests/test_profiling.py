@@ -0,0 +1,57 @@
+import threading
+
+import pandas as pd
+
+from src.profiling import CopyCounter, profile_call, profile_run
+
+
+def test_profile_run(fixture_data):
+    report = profile_run({"country_code": "FRA", "cold": True})
+    assert "gdp_adjusted" in report.result.columns
+    paths = [node["path"] for node in report.to_dict()["flame"]]
+    assert "process_all" in paths
+    assert report.caches["data_registry"]["misses"] > 0
+    assert "process_all" in report.to_text()
+    assert isinstance(report.to_dict()["copies"], dict)
+
+
+def test_copies_of_the_profiled_thread_only():
+    frame = pd.DataFrame({"a": [1.0, 2.0]})
+    started, stop = threading.Event(), threading.Event()
+
+    def copy_in_background():
+        started.set()
+        while not stop.is_set():
+            frame.copy()
+
+    def profiled():
+        frame.copy()
+        frame["a"].copy()
+        frame.copy()
+
+    thread = threading.Thread(target=copy_in_background)
+    thread.start()
+    started.wait()
+    try:
+        _, report = profile_call(profiled)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert report.copies == {"DataFrame": 2, "Series": 1}
+    assert report.to_dict()["copies"] == {"DataFrame": 2, "Series": 1}
+    assert "DataFrame: 2, Series: 1" in report.to_text()
+    assert "DataFrame: 2, Series: 1" in report.to_html()
+    # Restored once the last counter exits
+    assert CopyCounter.nb_active == 0
+    assert pd.core.generic.NDFrame.copy is CopyCounter.original_copy
+
+
+def test_nested_counters():
+    frame = pd.DataFrame({"a": [1.0]})
+    with CopyCounter() as outer:
+        frame.copy()
+        with CopyCounter() as inner:
+            frame.copy()
+    assert outer.counts == {"DataFrame": 2}
+    assert inner.counts == {"DataFrame": 1}
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from src.projection import (
+    LinearTrendModel,
+    ProjectionModel,
+    get_projection_model,
+    project_adjusted,
+)
+from src.utils.plugins import PROJECTION_PLUGINS
+
+
+def get_limits(missing_years):
+    return {
+        "water": {
+            "coef": 1,
+            "config": "water_general_wb",
+            "dict_parameters": {"missing_years": missing_years},
+        }
+    }
+
+
+def test_scenarios_with_different_limit_parameters(fixture_data):
+    list_dict_all_limits = [get_limits("skip"), get_limits("interpolate")]
+    kwargs = {"country_codes": ["FRA", "DEU"], "to_year": 2030}
+    result = project_adjusted(list_dict_all_limits, **kwargs)
+    for k, dict_all_limits in enumerate(list_dict_all_limits):
+        expected = project_adjusted(dict_all_limits, **kwargs)["gdp_adjusted"]
+        pd.testing.assert_frame_equal(
+            result[k], expected, check_names=False, check_column_type=False
+        )
+    assert not result[0].equals(result[1])
+
+
+def test_projection_models():
+    assert {"constant_growth", "linear_trend", "log_trend"} <= set(
+        PROJECTION_PLUGINS.names()
+    )
+    assert isinstance(get_projection_model("linear_trend"), LinearTrendModel)
+    with pytest.raises(ValueError, match="Unknown projection model"):
+        get_projection_model("unknown")
+    with pytest.raises(TypeError):
+        ProjectionModel()
@@ -0,0 +1,72 @@
+import numpy as np
+
+from src.utils.registry import DataRegistry
+
+
+class StubLoader:
+    """Returns an array of nbytes bytes per path and counts the loads."""
+
+    def __init__(self, nbytes=80):
+        self.nbytes = nbytes
+        self.loads = []
+
+    def __call__(self, path):
+        self.loads.append(path)
+        return np.zeros(self.nbytes // 8)
+
+
+def test_hits_and_misses():
+    registry, loader = DataRegistry(), StubLoader()
+    data = registry.get_data("a.csv", loader)
+    assert registry.get_data("a.csv", loader) is data
+    assert loader.loads == ["a.csv"]
+    assert registry.stats()["hits"] == 1
+    assert registry.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_entry():
+    registry, loader = DataRegistry(max_entries=2), StubLoader()
+    registry.get_data("a.csv", loader)
+    registry.get_data("b.csv", loader)
+    registry.get_data("a.csv", loader)
+    registry.get_data("c.csv", loader)
+    assert registry.contains("a.csv") and registry.contains("c.csv")
+    assert not registry.contains("b.csv")
+    assert registry.stats()["entries"] == 2
+
+
+def test_evicts_by_size():
+    registry, loader = DataRegistry(max_bytes=200), StubLoader(nbytes=80)
+    for path in ["a.csv", "b.csv", "c.csv"]:
+        registry.get_data(path, loader)
+    assert not registry.contains("a.csv")
+    assert registry.stats()["entries"] == 2
+    assert registry.stats()["nbytes"] == 160
+
+
+def test_keeps_newest_entry_over_budget():
+    registry = DataRegistry(max_bytes=100)
+    registry.get_data("small.csv", StubLoader(nbytes=80))
+    big = registry.get_data("big.csv", StubLoader(nbytes=800))
+    assert not registry.contains("small.csv")
+    assert registry.get_data("big.csv", StubLoader()) is big
+    assert registry.stats()["nbytes"] == 800
+
+
+def test_invalidate_path():
+    registry, loader = DataRegistry(), StubLoader()
+    registry.get_data("a.csv", loader)
+    registry.get_data("b.csv", loader)
+    registry.get_data("a.csv:scale=10", loader, source_path="a.csv")
+    registry.invalidate("a.csv")
+    assert not registry.contains("a.csv")
+    assert registry.contains("b.csv")
+    assert registry.stats()["entries"] == 1
+    assert registry.stats()["nbytes"] == 80
+
+    registry.get_data("a.csv", loader)
+    assert loader.loads.count("a.csv") == 2
+
+    registry.invalidate()
+    assert registry.stats()["entries"] == 0
+    assert registry.stats()["nbytes"] == 0
@@ -0,0 +1,33 @@
+import sqlite3
+
+import pandas as pd
+
+from src.utils import result_cache
+from src.utils.result_cache import ResultCache
+
+
+def test_connections_are_closed(tmp_path, monkeypatch):
+    connections = []
+    sqlite3_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        connection = sqlite3_connect(*args, **kwargs)
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(result_cache.sqlite3, "connect", connect)
+    cache = ResultCache(str(tmp_path / "results.sqlite"))
+    value = pd.DataFrame({"gdp": [1.0, 2.0]})
+    assert cache.get("key") is None
+    cache.set("key", value)
+    assert cache.get("key").equals(value)
+    assert cache.stats()["hits"] == 1
+    cache.clear()
+
+    assert connections
+    for connection in connections:
+        try:
+            connection.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            continue
+        raise AssertionError("a connection was left open")
@@ -0,0 +1,78 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from src.server import QueryHandler, QueryService
+
+
+class FailingService:
+    def query(self, query, timeout=None):
+        if query.get("slow"):
+            raise FutureTimeoutError()
+        raise TypeError("unsupported operand")
+
+
+@pytest.fixture
+def server():
+    handler = type(
+        "TestQueryHandler",
+        (QueryHandler,),
+        {"service": FailingService(), "timeout_seconds": 0.1},
+    )
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/query"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        (b"[1, 2]", 400),
+        (b"not json", 400),
+        (json.dumps({"slow": True}).encode(), 504),
+        (b"{}", 500),
+    ],
+)
+def test_errors_get_a_response(server, body, status):
+    assert post(server, body) == status
+
+
+def test_query_country_overrides_limit_country(fixture_data):
+    service = QueryService(limit_configs=["water_general_wb"], max_workers=1)
+    try:
+        dict_all_limits = {
+            "water": {
+                "coef": 1,
+                "config": "water_general_wb",
+                "dict_parameters": {"country_code": "DEU"},
+            }
+        }
+        result = service.query(
+            {"country_code": "FRA", "dict_all_limits": dict_all_limits}
+        )
+        expected = service.query(
+            {
+                "country_code": "FRA",
+                "dict_all_limits": {"water": {"coef": 1, "config": "water_general_wb"}},
+            }
+        )
+    finally:
+        service.shutdown()
+    assert result.equals(expected)
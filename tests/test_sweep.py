@@ -0,0 +1,31 @@
+import pandas as pd
+
+import main
+from src import sweep
+from src.utils.sinks import get_sink
+
+DICT_ALL_LIMITS = {"water": {"coef": 1, "config": "water_general_wb"}}
+
+
+def test_streamed_sweep_returns_the_path(fixture_data, tmp_path):
+    output_path = str(tmp_path / "sweep.csv")
+    result = main.sweep(
+        DICT_ALL_LIMITS,
+        country_codes=["FRA", "DEU"],
+        max_workers=1,
+        output_path=output_path,
+    )
+    assert result == output_path
+    tidy = pd.read_csv(output_path)
+    assert sorted(tidy["scenario_id"].unique()) == [0, 1]
+
+
+def test_empty_scenario_is_completed(monkeypatch, tmp_path):
+    # A scenario without any data gives an empty tidy frame
+    monkeypatch.setattr(
+        sweep, "process_all", lambda *args, **kwargs: pd.DataFrame(dtype=float)
+    )
+    scenarios = sweep.build_grid(DICT_ALL_LIMITS, country_codes=["FRA"])
+    with get_sink(str(tmp_path / "sweep.csv")) as sink:
+        sweep.run_sweep(scenarios, max_workers=1, sink=sink)
+        assert sink.completed_scenarios() == {0}
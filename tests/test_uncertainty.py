@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.indicator_process import IndicatorImplementorFactory
+from src.inverse import InverseProblem
+from src.limit_process import process_limits
+from src.limits.limit_implementor import LimitImplementor
+from src.limits.water_general_wb_limit import WaterGeneralWBLimit
+from src.uncertainty import monte_carlo_adjusted
+from src.utils.plugins import LIMIT_PLUGINS
+
+
+class PointwiseWaterLimit(WaterGeneralWBLimit):
+    """Same data, f evaluated point by point: no curve for the batched engines."""
+
+    def get_curve(self):
+        return None
+
+    def f_array(self, points):
+        return LimitImplementor.f_array(self, points)
+
+
+@pytest.fixture
+def dict_all_limits(fixture_data, monkeypatch):
+    monkeypatch.setitem(LIMIT_PLUGINS.classes, "pointwise_water", PointwiseWaterLimit)
+    return {"water": {"coef": 1, "config": "pointwise_water"}}
+
+
+def test_limit_without_curve_is_not_perturbed(dict_all_limits):
+    gdp = IndicatorImplementorFactory.get_implementor("gdp").data_creation()
+    result = monte_carlo_adjusted(
+        gdp,
+        dict_all_limits,
+        nb_draws=8,
+        coef_sigma=0.0,
+        quantiles=(0.05, 0.95),
+        indicator_name="gdp",
+    )
+    expected = process_limits(gdp, dict_all_limits, indicator_name="gdp")["gdp_adjusted"].to_numpy()
+    np.testing.assert_allclose(result[0.05].to_numpy(), expected)
+    np.testing.assert_allclose(result[0.95].to_numpy(), expected)
+
+
+def test_inverse_search_of_limit_without_curve(dict_all_limits):
+    gdp = IndicatorImplementorFactory.get_implementor("gdp").data_creation()
+    with pytest.raises(ValueError, match="no piecewise-linear curve"):
+        InverseProblem(gdp, dict_all_limits, gdp, curve_limits=["water"])